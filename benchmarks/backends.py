@@ -0,0 +1,66 @@
+"""Compare runner backends on short snippets.
+
+    python -m benchmarks.backends --runs 20 --languages python cpp
+
+Runs each snippet through services.code_runner.runner.run_code with every backend in turn and
+prints wall-clock latency percentiles (end to end, including sandbox setup and teardown).
+"""
+import argparse
+import statistics
+import time
+from services.code_runner import runner
+
+SNIPPETS = {
+    "python": 'print(sum(range(1000)))',
+    "cpp": '#include <iostream>\nint main() { long s = 0; for (int i = 0; i < 1000; i++) s += i; std::cout << s << std::endl; }',
+    "java": 'public class Solution { public static void main(String[] a) { System.out.println(499500); } }',
+}
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def bench(language: str, backend: str, runs: int) -> dict:
+    runner.BACKENDS[language] = backend
+    # The first run compiles and warms pools/caches; it is reported separately
+    started = time.perf_counter()
+    first = runner.run_code(SNIPPETS[language], language)
+    cold_ms = (time.perf_counter() - started) * 1000
+
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = runner.run_code(SNIPPETS[language], language)
+        samples.append((time.perf_counter() - started) * 1000)
+        if result.get("verdict") != "ok":
+            raise RuntimeError(f"{backend}/{language} run failed: {result}")
+
+    return {
+        "language": language,
+        "backend": backend,
+        "cold_ms": round(cold_ms, 1),
+        "first_verdict": first.get("verdict"),
+        "p50_ms": round(statistics.median(samples), 1),
+        "p95_ms": round(_percentile(samples, 0.95), 1),
+        "mean_ms": round(statistics.fmean(samples), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--languages", nargs="+", default=["python", "cpp"], choices=list(SNIPPETS))
+    parser.add_argument("--backends", nargs="+", default=["docker", "native"], choices=["docker", "native"])
+    args = parser.parse_args()
+
+    print(f"{'language':<8} {'backend':<8} {'cold':>8} {'p50':>8} {'p95':>8} {'mean':>8}")
+    for language in args.languages:
+        for backend in args.backends:
+            row = bench(language, backend, args.runs)
+            print(f"{row['language']:<8} {row['backend']:<8} {row['cold_ms']:>8} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['mean_ms']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Load-test the code-runner execute path.
+
+    python -m benchmarks.load worker --requests 200 --concurrency 8 --backend stub
+    python -m benchmarks.load http --url http://localhost:8000 --session-id <id> --user-id <id>
+
+"worker" calls services.code_runner.worker.run_code from a thread pool, as RQ workers would;
+"http" drives POST /execute against a running API and waits on /execute/{job_id}/stream.
+Both run a closed loop of `--concurrency` clients over a weighted mix of languages and program
+types, and print throughput plus p50/p95/p99 of queue wait, sandbox start, compile, run and
+end-to-end latency (from the moment a client sends the request). `--backend stub` (or
+RUNNER_BACKEND=stub on the workers) needs no Docker; verdicts are not checked then.
+"""
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# Program types per language, with the verdict each should get
+PROGRAMS = {
+    "python": {
+        "hello": 'print("hello")',
+        "cpu": "total = 0\nfor i in range(3_000_000):\n    total += i * i % 7\nprint(total)",
+        "output": "for i in range(5000):\n    print(i)",
+        "tle": "while True:\n    pass",
+    },
+    "cpp": {
+        "hello": '#include <iostream>\nint main() { std::cout << "hello" << std::endl; }',
+        "cpu": "#include <iostream>\nint main() { volatile unsigned long s = 0; for (long i = 0; i < 300000000; i++) s += i * i % 7; std::cout << s << std::endl; }",
+        "output": "#include <iostream>\nint main() { for (int i = 0; i < 5000; i++) std::cout << i << '\\n'; }",
+        "tle": "int main() { volatile unsigned long x = 0; for (;;) x++; }",
+    },
+    "java": {
+        "hello": 'public class Solution { public static void main(String[] a) { System.out.println("hello"); } }',
+        "cpu": "public class Solution { public static void main(String[] a) { long s = 0; for (long i = 0; i < 300000000L; i++) s += i * i % 7; System.out.println(s); } }",
+        "output": "public class Solution { public static void main(String[] a) { StringBuilder b = new StringBuilder(); for (int i = 0; i < 5000; i++) b.append(i).append('\\n'); System.out.print(b); } }",
+        "tle": "public class Solution { public static void main(String[] a) { long x = 0; while (true) x++; } }",
+    },
+}
+EXPECTED_VERDICTS = {"hello": "ok", "cpu": "ok", "output": "ok", "tle": "time_limit_exceeded"}
+COMMENT_PREFIX = {"python": "#", "cpp": "//", "java": "//"}
+
+METRICS = ["queue_wait_ms", "sandbox_ms", "compile_ms", "run_ms", "e2e_ms"]
+
+
+def _weights(spec: str, choices) -> dict[str, int]:
+    """Parse "python=3,cpp=1" (a bare name means weight 1)."""
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in choices:
+            raise argparse.ArgumentTypeError(f"unknown choice {name!r}, expected one of {', '.join(choices)}")
+        weights[name] = int(weight or 1)
+    return weights
+
+
+def _percentile(samples: list[float], pct: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _workload(args) -> list[tuple[str, str, str]]:
+    """(language, program, code) for every request, drawn from the weighted mix."""
+    rng = random.Random(args.seed)
+    languages, language_weights = zip(*args.languages.items())
+    programs, program_weights = zip(*args.programs.items())
+    workload = []
+    for _ in range(args.requests):
+        language = rng.choices(languages, language_weights)[0]
+        program = rng.choices(programs, program_weights)[0]
+        code = PROGRAMS[language][program]
+        if args.nonce:
+            # Defeats the result cache, request coalescing and the compile cache
+            code += f"\n{COMMENT_PREFIX[language]} {uuid.uuid4()}\n"
+        workload.append((language, program, code))
+    return workload
+
+
+class WorkerDriver:
+    """Calls the RQ job function in-process; queue wait is time spent waiting for a free client."""
+
+    def __init__(self, args):
+        from services.code_runner import runner, worker
+        if args.backend:
+            for language in runner.BACKENDS:
+                runner.BACKENDS[language] = args.backend
+        # The stub backend runs nothing, so every program "succeeds"
+        self.checks_verdicts = args.backend != "stub"
+        self.run_code = worker.run_code
+
+    def submit(self, language: str, code: str) -> tuple[dict, dict]:
+        return self.run_code(code, language), {}
+
+
+class HttpDriver:
+    """POSTs to /execute and waits for the result on the job's event stream."""
+
+    checks_verdicts = True
+
+    def __init__(self, args):
+        self.url = args.url.rstrip("/")
+        self.session_id = args.session_id
+        self.timeout = args.http_timeout
+        token = args.token
+        if token is None:
+            from helpers.gen_JWT_token import create_token
+            token = create_token({"sub": args.user_id})
+        self.headers = {"Cookie": f"access_token={token}", "Content-Type": "application/json"}
+
+    def _request(self, method: str, path: str, body: dict | None = None):
+        request = urllib.request.Request(
+            self.url + path,
+            data=json.dumps(body).encode() if body is not None else None,
+            headers=self.headers,
+            method=method,
+        )
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def _wait(self, job_id: str) -> dict:
+        with self._request("GET", f"/execute/{job_id}/stream") as response:
+            event = None
+            for line in response:
+                line = line.decode().strip()
+                if line.startswith("event:"):
+                    event = line.split(":", 1)[1].strip()
+                elif line.startswith("data:") and event in ("result", "timeout"):
+                    payload = json.loads(line.split(":", 1)[1])
+                    if event == "timeout":
+                        raise TimeoutError(f"job {job_id} did not finish in time")
+                    return payload
+        raise RuntimeError(f"stream for job {job_id} closed without a result")
+
+    def submit(self, language: str, code: str) -> tuple[dict, dict]:
+        body = {"language": language, "code": code, "session_id": self.session_id}
+        rejected = 0
+        while True:
+            try:
+                with self._request("POST", "/execute", body) as response:
+                    submitted = json.loads(response.read())
+                break
+            except urllib.error.HTTPError as e:
+                if e.code != 429:
+                    raise
+                # Admission control: back off as instructed and count the rejection
+                rejected += 1
+                time.sleep(int(e.headers.get("Retry-After", "1")))
+
+        extra = {"rejected": rejected, "cached": bool(submitted.get("cached"))}
+        if submitted.get("result") is not None:
+            return submitted["result"], extra
+        payload = self._wait(submitted["job_id"])
+        if payload.get("status") != "finished":
+            return {"status": "error", "output": payload.get("error", "Job failed")}, extra
+        return payload["result"], extra
+
+
+def run(driver, workload: list[tuple[str, str, str]], concurrency: int) -> tuple[list[dict], float]:
+    samples = []
+    lock = threading.Lock()
+
+    def _one(item, submitted_at: float):
+        language, program, code = item
+        started = time.perf_counter()
+        try:
+            result, extra = driver.submit(language, code)
+        except Exception as e:
+            result, extra = {"status": "error", "output": str(e)}, {}
+        finished = time.perf_counter()
+
+        # A cached result carries the timings of the run that produced it
+        timings = {} if extra.get("cached") else result.get("timings") or {}
+        sample = {
+            "language": language,
+            "program": program,
+            "verdict": result.get("verdict") or result.get("status"),
+            "expected": EXPECTED_VERDICTS[program] if driver.checks_verdicts else None,
+            "e2e_ms": (finished - started) * 1000,
+            "sandbox_ms": timings.get("sandbox_ms"),
+            "compile_ms": timings.get("compile_ms"),
+            "run_ms": timings.get("run_ms"),
+            **extra,
+        }
+        # Queue wait as the worker saw it, else the wait for a free client slot
+        if timings.get("queue_wait_ms") is not None:
+            sample["queue_wait_ms"] = timings["queue_wait_ms"]
+        elif isinstance(driver, WorkerDriver):
+            sample["queue_wait_ms"] = (started - submitted_at) * 1000
+        with lock:
+            samples.append(sample)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for item in workload:
+            pool.submit(_one, item, time.perf_counter())
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples: list[dict], elapsed: float) -> dict:
+    def _stats(values: list[float]) -> dict:
+        return {
+            "count": len(values),
+            "p50": _round(_percentile(values, 0.5)),
+            "p95": _round(_percentile(values, 0.95)),
+            "p99": _round(_percentile(values, 0.99)),
+            "mean": _round(statistics.fmean(values)) if values else None,
+        }
+
+    summary = {
+        "requests": len(samples),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+        "unexpected_verdicts": sum(s["expected"] is not None and s["verdict"] != s["expected"] for s in samples),
+        "rejected_429": sum(s.get("rejected", 0) for s in samples),
+        "cached": sum(bool(s.get("cached")) for s in samples),
+        "metrics": {
+            metric: _stats([s[metric] for s in samples if s.get(metric) is not None])
+            for metric in METRICS
+        },
+        "by_program": {},
+    }
+    for language, program in sorted({(s["language"], s["program"]) for s in samples}):
+        group = [s for s in samples if s["language"] == language and s["program"] == program]
+        summary["by_program"][f"{language}/{program}"] = {
+            **_stats([s["e2e_ms"] for s in group]),
+            "verdicts": dict(sorted(Counter(s["verdict"] for s in group).items())),
+        }
+    return summary
+
+
+def _round(value: float | None) -> float | None:
+    return round(value, 1) if value is not None else None
+
+
+def _print_summary(summary: dict):
+    print(
+        f"{summary['requests']} requests in {summary['elapsed_s']}s: {summary['throughput_rps']} req/s, "
+        f"{summary['unexpected_verdicts']} unexpected verdicts, {summary['rejected_429']} rejected (429), "
+        f"{summary['cached']} cached"
+    )
+    header = f"{'':<16} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'mean':>9}"
+    print()
+    print(header)
+    for metric, stats in summary["metrics"].items():
+        print(f"{metric:<16} {stats['count']:>6} {_cell(stats['p50'])} {_cell(stats['p95'])} {_cell(stats['p99'])} {_cell(stats['mean'])}")
+    print()
+    print(header.replace(" " * 16, f"{'e2e_ms':<16}", 1) + "  verdicts")
+    for name, stats in summary["by_program"].items():
+        verdicts = ", ".join(f"{v}={n}" for v, n in stats["verdicts"].items())
+        print(f"{name:<16} {stats['count']:>6} {_cell(stats['p50'])} {_cell(stats['p95'])} {_cell(stats['p99'])} {_cell(stats['mean'])}  {verdicts}")
+
+
+def _cell(value: float | None) -> str:
+    return f"{'-' if value is None else value:>9}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("mode", choices=["worker", "http"])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--languages", default="python=1", type=lambda spec: _weights(spec, PROGRAMS),
+        help='weighted language mix, e.g. "python=3,cpp=1"',
+    )
+    parser.add_argument(
+        "--programs", default="hello=6,cpu=2,output=1,tle=1", type=lambda spec: _weights(spec, EXPECTED_VERDICTS),
+        help="weighted program mix of " + ", ".join(EXPECTED_VERDICTS),
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--nonce", action=argparse.BooleanOptionalAction, default=True,
+        help="make every program unique so no cache answers it (default: on)",
+    )
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    worker_args = parser.add_argument_group("worker mode")
+    worker_args.add_argument("--backend", choices=["docker", "native", "stub"], help="override RUNNER_BACKEND")
+    http_args = parser.add_argument_group("http mode")
+    http_args.add_argument("--url", default="http://localhost:8000")
+    http_args.add_argument("--session-id", help="interview session the runs are recorded against")
+    http_args.add_argument("--user-id", help="owner of the session; a token is minted for them")
+    http_args.add_argument("--token", help="access_token cookie to send instead of minting one")
+    http_args.add_argument("--http-timeout", type=int, default=60)
+    args = parser.parse_args()
+
+    if args.mode == "http":
+        if not args.session_id or not (args.user_id or args.token):
+            parser.error("http mode needs --session-id and --user-id or --token")
+        driver = HttpDriver(args)
+    else:
+        driver = WorkerDriver(args)
+
+    samples, elapsed = run(driver, _workload(args), args.concurrency)
+    summary = summarize(samples, elapsed)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        _print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import hashlib
+import os
+from helpers.redis_client import redis_conn
+
+# How long an identical (language, code, stdin) run is served from cache
+EXEC_CACHE_TTL_SEC = int(os.getenv("EXEC_CACHE_TTL_SEC", "300"))
+# Upper bound on how long a job is treated as in flight (covers crashed workers)
+INFLIGHT_TTL_SEC = int(os.getenv("EXEC_INFLIGHT_TTL_SEC", "30"))
+
+STATS_KEY = "exec_cache:stats"
+
+
+def execution_key(language: str, code: str, stdin: str) -> str:
+    digest = hashlib.sha256()
+    for part in (language, code, stdin):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_cached_result(key: str) -> bytes | None:
+    """Cached serialized result for `key`; records a hit or miss."""
+    cached = redis_conn.get(f"exec_cache:result:{key}")
+    redis_conn.hincrby(STATS_KEY, "hits" if cached is not None else "misses", 1)
+    return cached
+
+
+def store_result(key: str, serialized: str):
+    redis_conn.set(f"exec_cache:result:{key}", serialized, ex=EXEC_CACHE_TTL_SEC)
+
+
+def claim_inflight(key: str, job_id: str) -> str | None:
+    """Register `job_id` as the in-flight run for `key`.
+
+    Returns None if the claim succeeded, else the id of the job already in flight.
+    """
+    if redis_conn.set(f"exec_cache:inflight:{key}", job_id, nx=True, ex=INFLIGHT_TTL_SEC):
+        return None
+    existing = redis_conn.get(f"exec_cache:inflight:{key}")
+    return existing.decode() if existing is not None else None
+
+
+def replace_inflight(key: str, job_id: str):
+    redis_conn.set(f"exec_cache:inflight:{key}", job_id, ex=INFLIGHT_TTL_SEC)
+
+
+def release_inflight(key: str, job_id: str):
+    inflight_key = f"exec_cache:inflight:{key}"
+    # Only clear our own claim; a newer job may have replaced it
+    if redis_conn.get(inflight_key) == job_id.encode():
+        redis_conn.delete(inflight_key)
+
+
+def record_coalesced():
+    redis_conn.hincrby(STATS_KEY, "coalesced", 1)
+
+
+def cache_stats() -> dict:
+    raw = {k.decode(): int(v) for k, v in redis_conn.hgetall(STATS_KEY).items()}
+    hits = raw.get("hits", 0)
+    misses = raw.get("misses", 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "coalesced": raw.get("coalesced", 0),
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "ttl_sec": EXEC_CACHE_TTL_SEC,
+    }
+
+
+def add_viewer(job_id: str, user_id: str):
+    """Let `user_id` read a job it was coalesced onto."""
+    viewers_key = f"exec_cache:viewers:{job_id}"
+    pipe = redis_conn.pipeline()
+    pipe.sadd(viewers_key, user_id)
+    pipe.expire(viewers_key, EXEC_CACHE_TTL_SEC + INFLIGHT_TTL_SEC)
+    pipe.execute()
+
+
+def is_viewer(job_id: str, user_id: str) -> bool:
+    return bool(redis_conn.sismember(f"exec_cache:viewers:{job_id}", user_id))
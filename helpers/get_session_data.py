@@ -8,6 +8,7 @@ from modules.db import (
 	Session_Code_State,
 	Session_Message,
 	Session_Feedback,
+	Session_Submission,
 )
 from helpers.auth_deps import get_current_user
 from sqlmodel import Session, select
@@ -112,6 +113,32 @@ def fetch_session_metrics(db: Session, session_uuid: uuid.UUID) -> dict | None:
 	}
 
 
+def fetch_session_submissions(db: Session, session_uuid: uuid.UUID) -> list[dict]:
+	submissions = db.exec(
+		select(Session_Submission)
+		.where(Session_Submission.session_id == session_uuid)
+		.order_by(Session_Submission.created_at)
+	).all()
+
+	return [
+		{
+			"submission_id": str(s.submission_id),
+			"session_id": str(s.session_id),
+			"job_id": s.job_id,
+			"language": s.language,
+			"kind": s.kind,
+			"verdict": s.verdict,
+			"exit_code": s.exit_code,
+			"wall_time_ms": s.wall_time_ms,
+			"cpu_user_ms": s.cpu_user_ms,
+			"cpu_sys_ms": s.cpu_sys_ms,
+			"peak_memory_kb": s.peak_memory_kb,
+			"created_at": s.created_at,
+		}
+		for s in submissions
+	]
+
+
 def fetch_session_feedback(db: Session, session_uuid: uuid.UUID) -> dict | None:
 	feedback = db.exec(
 		select(Session_Feedback)
@@ -176,6 +203,13 @@ def get_session_metrics(session_id: str, user_id: str = Depends(get_current_user
 		return fetch_session_metrics(db, session_uuid)
 
 
+def get_session_submissions(session_id: str, user_id: str = Depends(get_current_user)):
+	with Session(engine) as db:
+		session_uuid, user_uuid = parse_session_and_user_ids(session_id, user_id)
+		get_session_row(db, session_uuid, user_uuid)
+		return fetch_session_submissions(db, session_uuid)
+
+
 def get_session_feedback(session_id: str, user_id: str = Depends(get_current_user)):
 	with Session(engine) as db:
 		session_uuid, user_uuid = parse_session_and_user_ids(session_id, user_id)
@@ -194,6 +228,7 @@ def get_session_data(session_id: str, user_id: str = Depends(get_current_user)):
 		"messages": get_session_messages(session_id, user_id),
 		"code_states": get_session_code_states(session_id, user_id),
 		"metrics": get_session_metrics(session_id, user_id),
+		"submissions": get_session_submissions(session_id, user_id),
 		"feedback": get_session_feedback(session_id, user_id),
 	}
 
@@ -1,5 +1,5 @@
 from modules.db import engine
-from modules.db import Session_Metrics
+from modules.db import Session_Metrics, Session_Submission
 from helpers.get_session_data import get_session_row,fetch_session_timer,parse_session_and_user_ids
 from sqlmodel import Session
 from sqlalchemy import update
@@ -72,3 +72,25 @@ def increment_hints_used(session_id: str, user_id: str):
 
         db.exec(stmt)
         db.commit()
+
+
+def record_submission(session_id: str, user_id: str, language: str, kind: str, result: dict, job_id: str | None = None):
+    """Persist the verdict and resource usage of one run/judge result for the session."""
+    usage = result.get("usage") or {}
+    with Session(engine) as db:
+        session_uuid, user_uuid = parse_session_and_user_ids(session_id, user_id)
+        session_row = get_session_row(db, session_uuid, user_uuid)
+
+        db.add(Session_Submission(
+            session_id=session_row.session_id,
+            job_id=job_id,
+            language=language,
+            kind=kind,
+            verdict=result.get("verdict"),
+            exit_code=result.get("exit_code"),
+            wall_time_ms=usage.get("wall_time_ms"),
+            cpu_user_ms=usage.get("cpu_user_ms"),
+            cpu_sys_ms=usage.get("cpu_sys_ms"),
+            peak_memory_kb=usage.get("peak_memory_kb"),
+        ))
+        db.commit()
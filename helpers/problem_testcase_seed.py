@@ -0,0 +1,35 @@
+from modules.db import Problems, Problem_TestCase, engine
+from sqlmodel import Session, select
+import json
+
+
+def seed_problem_testcases(problems):
+	try:
+		with Session(engine) as session:
+			for problem in problems:
+				stmt = select(Problems).where(Problems.title == problem["title"])
+				prob = session.exec(stmt).first()
+
+				if not prob:
+					continue
+
+				for ordinal, case in enumerate(problem["cases"]):
+					testcase = Problem_TestCase(
+						problem_id=prob.problem_id,
+						ordinal=ordinal,
+						input=case["input"],
+						expected_output=case["expected_output"],
+						is_sample=case.get("is_sample", False),
+					)
+					session.add(testcase)
+
+			session.commit()
+			print("problem test cases added")
+	except Exception as e:
+		print(e)
+
+
+if __name__ == "__main__":
+	with open("helpers\\problems_testcases.json", "r") as file:
+		data = json.load(file)
+		seed_problem_testcases(data["testcases"])
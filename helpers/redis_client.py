@@ -1,10 +1,18 @@
 from rq import Queue
 from redis import Redis
+from redis import asyncio as aioredis
 import os
 
 redis_host = os.getenv("REDIS_HOST", "localhost")
 redis_port = int(os.getenv("REDIS_PORT", "6379"))
 
 redis_conn = Redis(host=redis_host, port=redis_port)
+async_redis_conn = aioredis.Redis(host=redis_host, port=redis_port)
 task_queue = Queue("code_queue", connection=redis_conn)
+# Submissions from interviews in progress; workers drain it before code_queue
+priority_queue = Queue("code_queue_high", connection=redis_conn)
 
+
+def job_channel(job_id: str) -> str:
+    """Pub/sub channel the worker publishes a code job's outcome on."""
+    return f"code_job:{job_id}"
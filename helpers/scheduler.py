@@ -0,0 +1,143 @@
+import math
+import os
+from fastapi import HTTPException, status
+from rq import Queue, Worker
+from rq.job import Job
+from rq.registry import StartedJobRegistry
+from rq.utils import now
+from helpers.redis_client import redis_conn, task_queue, priority_queue
+
+# Jobs one user may have queued or running at once
+USER_MAX_ACTIVE_JOBS = int(os.getenv("USER_MAX_ACTIVE_JOBS", "2"))
+# Backlog each worker may have waiting before new practice runs are turned away.
+# Interview submissions (priority queue) are admitted until their own queue reaches this backlog.
+QUEUE_BACKLOG_PER_WORKER = int(os.getenv("QUEUE_BACKLOG_PER_WORKER", "10"))
+# Safety expiry on a user's active-job counter, in case a worker dies without running callbacks
+USER_SLOT_TTL_SEC = int(os.getenv("USER_SLOT_TTL_SEC", "120"))
+# Recent wait/run samples kept per queue for the stats endpoint and Retry-After estimates
+QUEUE_STATS_SAMPLES = 200
+# Assumed job run time until real samples exist
+DEFAULT_RUN_MS = 1000
+
+# Listed in the order workers drain them
+QUEUES = [priority_queue, task_queue]
+
+
+def _user_key(user_id: str) -> str:
+    return f"sched:active:{user_id}"
+
+
+def queue_for(interview_active: bool) -> Queue:
+    """Submissions from an interview in progress jump ahead of practice runs."""
+    return priority_queue if interview_active else task_queue
+
+
+def _worker_count() -> int:
+    # Never divide by zero while workers restart; jobs still queue up for them
+    return max(1, Worker.count(connection=redis_conn, queue=task_queue))
+
+
+def _recent_ms(queue: Queue, kind: str) -> list[int]:
+    return [int(v) for v in redis_conn.lrange(f"sched:{kind}:{queue.name}", 0, -1)]
+
+
+def _retry_after(backlog: int, workers: int) -> int:
+    """Seconds until roughly `backlog` jobs have drained through `workers`."""
+    runs = _recent_ms(task_queue, "run") + _recent_ms(priority_queue, "run")
+    avg_run_ms = sum(runs) / len(runs) if runs else DEFAULT_RUN_MS
+    return max(1, math.ceil(backlog * avg_run_ms / 1000 / workers))
+
+
+def _reject(detail: str, retry_after: int):
+    raise HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def admit(user_id: str, queue: Queue):
+    """Reserve one of the user's job slots, or raise 429 when the user or the queue is saturated.
+
+    Every admitted job must hand its slot back with release_slot() once it finishes.
+    """
+    workers = _worker_count()
+    # Practice runs wait behind every interview submission; interview submissions only behind each other
+    backlog = sum(q.count for q in QUEUES[:QUEUES.index(queue) + 1])
+    if backlog >= workers * QUEUE_BACKLOG_PER_WORKER:
+        _reject("Code runners are busy, try again shortly", _retry_after(backlog, workers))
+
+    key = _user_key(user_id)
+    pipe = redis_conn.pipeline()
+    pipe.incr(key)
+    pipe.expire(key, USER_SLOT_TTL_SEC)
+    active, _ = pipe.execute()
+    if active > USER_MAX_ACTIVE_JOBS:
+        redis_conn.decr(key)
+        _reject(
+            f"At most {USER_MAX_ACTIVE_JOBS} runs may be pending at once",
+            _retry_after(min(active - 1, USER_MAX_ACTIVE_JOBS), workers),
+        )
+
+
+def release_slot(user_id: str):
+    key = _user_key(user_id)
+    # The counter may already have expired; never let it go negative
+    if redis_conn.decr(key) <= 0:
+        redis_conn.delete(key)
+
+
+def _record_sample(queue_name: str, kind: str, value_ms: int):
+    key = f"sched:{kind}:{queue_name}"
+    pipe = redis_conn.pipeline()
+    pipe.lpush(key, value_ms)
+    pipe.ltrim(key, 0, QUEUE_STATS_SAMPLES - 1)
+    pipe.execute()
+
+
+def record_timings(job: Job):
+    """Record how long `job` waited in its queue and how long it ran (called from job callbacks)."""
+    if job.enqueued_at is None or job.started_at is None:
+        return
+    _record_sample(job.origin, "wait", int((job.started_at - job.enqueued_at).total_seconds() * 1000))
+    _record_sample(job.origin, "run", int((now() - job.started_at).total_seconds() * 1000))
+
+
+def _percentile(samples: list[int], pct: float) -> int | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def queue_stats() -> dict:
+    workers = _worker_count()
+    stats = {"workers": workers, "queues": []}
+    for queue in QUEUES:
+        waits = _recent_ms(queue, "wait")
+        runs = _recent_ms(queue, "run")
+        oldest = queue.get_jobs(0, 1)
+        stats["queues"].append({
+            "name": queue.name,
+            "depth": queue.count,
+            "running": StartedJobRegistry(queue=queue).count,
+            "oldest_wait_ms": int((now() - oldest[0].enqueued_at).total_seconds() * 1000) if oldest and oldest[0].enqueued_at else 0,
+            "wait_ms_p50": _percentile(waits, 0.5),
+            "wait_ms_p95": _percentile(waits, 0.95),
+            "run_ms_p50": _percentile(runs, 0.5),
+            "run_ms_p95": _percentile(runs, 0.95),
+            "samples": len(waits),
+        })
+    # One entry per RQ worker; a threaded worker registers one per slot
+    stats["slots"] = [
+        {
+            "name": worker.name,
+            "state": worker.get_state(),
+            "job_id": worker.get_current_job_id(),
+            "last_heartbeat": worker.last_heartbeat.isoformat() if worker.last_heartbeat else None,
+            "successful": worker.successful_job_count,
+            "failed": worker.failed_job_count,
+        }
+        for worker in sorted(Worker.all(connection=redis_conn), key=lambda w: w.name)
+    ]
+    return stats
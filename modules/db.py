@@ -50,6 +50,14 @@ class User_Problem_Status(SQLModel,table=True):
     solved_at: Optional[datetime] = None
 
 
+class Problem_TestCase(SQLModel, table=True):
+    testcase_id: uuid.UUID | None = Field(default_factory=uuid.uuid4, primary_key=True)
+    problem_id: uuid.UUID = Field(foreign_key="problems.problem_id", index=True)
+    ordinal: int = 0
+    input: str
+    expected_output: str
+    is_sample: bool = False
+
 class Problem_topics(SQLModel,table=True):
     id: int | None = Field(default=None, primary_key=True)
     problem_id: uuid.UUID = Field(foreign_key="problems.problem_id")
@@ -91,6 +99,20 @@ class Session_Metrics(SQLModel, table=True):
     hints_used: int = 0
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class Session_Submission(SQLModel, table=True):
+    submission_id: uuid.UUID | None = Field(default_factory=uuid.uuid4, primary_key=True)
+    session_id: uuid.UUID = Field(foreign_key="interview_session.session_id", index=True)
+    job_id: str | None = None
+    language: str
+    kind: str = "run"  # "run" or "judge"
+    verdict: str | None = None
+    exit_code: int | None = None
+    wall_time_ms: int | None = None
+    cpu_user_ms: int | None = None
+    cpu_sys_ms: int | None = None
+    peak_memory_kb: int | None = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
 class Session_Feedback(SQLModel, table=True):
     session_id: uuid.UUID = Field(
         foreign_key="interview_session.session_id",
@@ -1,44 +1,313 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+import json
+import os
+import uuid
+from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from helpers.redis_client import task_queue
-from helpers.populate_sesson_metrics import populate_time_to_first_submission_sec,increment_total_submissions
-from services.code_runner.worker import run_code
+from rq import Callback
+from rq.exceptions import NoSuchJobError
+from rq.job import Job, JobStatus
+from sqlmodel import Session, select
+from modules.db import engine, Problem_TestCase
+from helpers.redis_client import redis_conn, async_redis_conn, job_channel
+from helpers.scheduler import queue_for, admit, release_slot, queue_stats
+from helpers.populate_sesson_metrics import populate_time_to_first_submission_sec,increment_total_submissions,record_submission
+from helpers.get_session_data import parse_session_and_user_ids, get_session_row
+from helpers.execution_cache import (
+    execution_key,
+    get_cached_result,
+    claim_inflight,
+    replace_inflight,
+    release_inflight,
+    record_coalesced,
+    add_viewer,
+    is_viewer,
+    cache_stats,
+)
+from services.code_runner.worker import run_code, run_batch, judge_code, publish_result, publish_failure
+from services.code_runner.judge import judge_timeout
+from services.code_runner.runner import batch_timeout
 from helpers.auth_deps import get_current_user
 
+# How long a stream client waits for a result before giving up
+STREAM_TIMEOUT_SEC = 30
+# Fallback status check while streaming, in case the pub/sub message was missed
+STREAM_STATUS_CHECK_SEC = 5
+# Most items (and distinct programs) one /execute/batch request may carry
+BATCH_MAX_ITEMS = int(os.getenv("EXEC_BATCH_MAX_ITEMS", "10"))
+
 class ExecuteRequest(BaseModel):
     language:str
     code:str
     session_id:str
+    stdin:str = ""
+
+
+class BatchItem(BaseModel):
+    # Falls back to the batch's code
+    code:str | None = None
+    stdin:str = ""
+
+
+class BatchRequest(BaseModel):
+    language:str
+    session_id:str
+    code:str | None = None
+    items:list[BatchItem]
+
+
+class JudgeRequest(BaseModel):
+    language:str
+    code:str
+    session_id:str
+    stop_on_first_failure:bool = False
 
 
 router = APIRouter()
 
-##testing for now
-@router.post("/execute")
-def execute_user_code(req:ExecuteRequest, user_id: str = Depends(get_current_user)):
-    import time
 
-    ## check for first time code run , update time_to_first_submission_sec 
+def _load_test_cases(session_id: str, user_id: str) -> list[dict]:
+    with Session(engine) as db:
+        session_uuid, user_uuid = parse_session_and_user_ids(session_id, user_id)
+        session_row = get_session_row(db, session_uuid, user_uuid)
+        rows = db.exec(
+            select(Problem_TestCase)
+            .where(Problem_TestCase.problem_id == session_row.problem_id)
+            .order_by(Problem_TestCase.ordinal)
+        ).all()
+
+    return [{"input": r.input, "expected_output": r.expected_output} for r in rows]
+
+
+def _interview_active(session_id: str, user_id: str) -> bool:
+    with Session(engine) as db:
+        session_uuid, user_uuid = parse_session_and_user_ids(session_id, user_id)
+        return get_session_row(db, session_uuid, user_uuid).status == "ACTIVE"
+
+
+def _enqueue(user_id: str, session_id: str, func, **kwargs) -> Job:
+    """Admit and enqueue a job for `user_id`; raises 429 when the user or the runners are saturated."""
+    queue = queue_for(_interview_active(session_id, user_id))
+    admit(user_id, queue)
+    kwargs["meta"] = {**kwargs.get("meta", {}), "user_id": user_id, "session_id": session_id, "holds_slot": True}
+    try:
+        return queue.enqueue(
+            func,
+            on_success=Callback(publish_result),
+            on_failure=Callback(publish_failure),
+            **kwargs,
+        )
+    except Exception:
+        release_slot(user_id)
+        raise
+
+
+def _fetch_job(job_id: str) -> Job | None:
+    try:
+        return Job.fetch(job_id, connection=redis_conn)
+    except NoSuchJobError:
+        return None
+
+
+def _get_job_or_404(job_id: str, user_id: str) -> Job:
+    job = _fetch_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+    # Users coalesced onto someone else's identical run may read it too
+    if job.meta.get("user_id") != user_id and not is_viewer(job_id, user_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+def _job_payload(job: Job) -> dict:
+    job_status = job.get_status()
+    payload = {"job_id": job.id, "status": job_status.value}
+    if job_status == JobStatus.FINISHED:
+        payload["result"] = job.return_value(refresh=True)
+    elif job_status == JobStatus.FAILED:
+        payload["error"] = "Job failed"
+    return payload
+
+
+def _is_done(payload: dict) -> bool:
+    return payload["status"] in (JobStatus.FINISHED.value, JobStatus.FAILED.value)
+
+
+@router.post("/execute", status_code=status.HTTP_202_ACCEPTED)
+def execute_user_code(req:ExecuteRequest, user_id: str = Depends(get_current_user)):
+    ## check for first time code run , update time_to_first_submission_sec
     ## count total_submissions
     populate_time_to_first_submission_sec(req.session_id, user_id)
     increment_total_submissions(req.session_id, user_id)
 
-    job = task_queue.enqueue(
-        run_code,
-        code = req.code,
+    cache_key = execution_key(req.language, req.code, req.stdin)
+    cached = get_cached_result(cache_key)
+    if cached is not None:
+        result = json.loads(cached)
+        if result.get("verdict"):
+            record_submission(req.session_id, user_id, req.language, "run", result)
+        return {
+            "job_id": None,
+            "status": JobStatus.FINISHED.value,
+            "result": result,
+            "cached": True,
+        }
+
+    # Single-flight: identical runs already queued or running are shared instead of re-enqueued
+    job_id = str(uuid.uuid4())
+    inflight_id = claim_inflight(cache_key, job_id)
+    if inflight_id is not None:
+        inflight = _fetch_job(inflight_id)
+        if inflight is not None and not inflight.is_failed:
+            add_viewer(inflight_id, user_id)
+            record_coalesced()
+            return {"job_id": inflight_id, "status": inflight.get_status(refresh=False).value, "coalesced": True}
+        replace_inflight(cache_key, job_id)
+
+    try:
+        _enqueue(
+            user_id,
+            req.session_id,
+            run_code,
+            code = req.code,
+            language=req.language,
+            stdin=req.stdin,
+            job_id=job_id,
+            job_timeout=5,
+            meta={"cache_key": cache_key, "language": req.language, "kind": "run"},
+        )
+    except Exception:
+        # Don't leave other callers coalescing onto a job that was never queued
+        release_inflight(cache_key, job_id)
+        raise
+
+    return {"job_id": job_id, "status": JobStatus.QUEUED.value}
+
+
+@router.post("/execute/batch", status_code=status.HTTP_202_ACCEPTED)
+def execute_batch(req:BatchRequest, user_id: str = Depends(get_current_user)):
+    """Run one program against several stdins, or several programs, as a single job in one sandbox.
+
+    Results come back in item order under "results"; /execute/{job_id}/stream also emits an
+    `item` event as each one completes.
+    """
+    if not req.items or len(req.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch takes 1 to {BATCH_MAX_ITEMS} items",
+        )
+
+    # Identical programs are compiled once and share a source file
+    programs, inputs = [], []
+    for item in req.items:
+        code = item.code if item.code is not None else req.code
+        if code is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Every item needs code")
+        if code not in programs:
+            programs.append(code)
+        inputs.append((programs.index(code), item.stdin))
+
+    # One batch counts as one submission
+    populate_time_to_first_submission_sec(req.session_id, user_id)
+    increment_total_submissions(req.session_id, user_id)
+
+    job = _enqueue(
+        user_id,
+        req.session_id,
+        run_batch,
+        programs=programs,
         language=req.language,
-        job_timeout=5
+        inputs=inputs,
+        job_timeout=batch_timeout(len(programs), len(inputs)) + 5,
+        meta={"language": req.language, "kind": "batch"},
     )
 
-    # Poll for result (max 10 seconds)
-    for _ in range(30):
-        job.refresh()
-        if job.is_finished:
-            return job.result
-        if job.is_failed:
-            raise HTTPException(status_code=500, detail="Job failed")
-        time.sleep(0.1)
+    return {"job_id": job.id, "status": JobStatus.QUEUED.value, "items": len(inputs)}
+
+
+@router.post("/execute/judge", status_code=status.HTTP_202_ACCEPTED)
+def judge_user_code(req:JudgeRequest, user_id: str = Depends(get_current_user)):
+    test_cases = _load_test_cases(req.session_id, user_id)
+    if not test_cases:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No test cases for this problem")
 
-    raise HTTPException(status_code=202, detail="Job queued, result not ready")
+    populate_time_to_first_submission_sec(req.session_id, user_id)
+    increment_total_submissions(req.session_id, user_id)
 
-   
+    job = _enqueue(
+        user_id,
+        req.session_id,
+        judge_code,
+        code=req.code,
+        language=req.language,
+        test_cases=test_cases,
+        stop_on_first_failure=req.stop_on_first_failure,
+        job_timeout=judge_timeout(len(test_cases)) + 5,
+        meta={"language": req.language, "kind": "judge"},
+    )
+
+    return {"job_id": job.id, "status": JobStatus.QUEUED.value}
+
+
+@router.get("/execute/cache/stats")
+def execution_cache_stats(user_id: str = Depends(get_current_user)):
+    return cache_stats()
+
+
+@router.get("/execute/queues")
+def execution_queue_stats(user_id: str = Depends(get_current_user)):
+    return queue_stats()
+
+
+@router.get("/execute/{job_id}")
+def get_execution(job_id: str, user_id: str = Depends(get_current_user)):
+    return _job_payload(_get_job_or_404(job_id, user_id))
+
+
+@router.get("/execute/{job_id}/stream")
+async def stream_execution(job_id: str, user_id: str = Depends(get_current_user)):
+    """Server-sent events: a single `result` event once the worker publishes the outcome.
+
+    Batch jobs emit an `item` event per completed item before it.
+    """
+    job = await run_in_threadpool(_get_job_or_404, job_id, user_id)
+
+    async def _events():
+        pubsub = async_redis_conn.pubsub()
+        # Subscribe before reading the status so a result landing in between is not missed
+        await pubsub.subscribe(job_channel(job_id))
+        try:
+            payload = await run_in_threadpool(_job_payload, job)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + STREAM_TIMEOUT_SEC
+            next_check = loop.time() + STREAM_STATUS_CHECK_SEC
+
+            while not _is_done(payload) and loop.time() < deadline:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    published = json.loads(message["data"])
+                    if published["status"] == "item":
+                        yield f"event: item\ndata: {json.dumps(published)}\n\n"
+                        # A batch is making progress; give the rest of it a fresh timeout
+                        deadline = loop.time() + STREAM_TIMEOUT_SEC
+                    else:
+                        payload = published
+                elif loop.time() >= next_check:
+                    payload = await run_in_threadpool(_job_payload, job)
+                    next_check = loop.time() + STREAM_STATUS_CHECK_SEC
+                    yield ": keep-alive\n\n"
+
+            event = "result" if _is_done(payload) else "timeout"
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
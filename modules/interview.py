@@ -7,6 +7,7 @@ from helpers.get_session_data import (
     get_session_messages,
     get_session_code_states,
     get_session_metrics,
+    get_session_submissions,
     get_session_feedback,
     get_session_timer,
 )
@@ -57,6 +58,11 @@ def session_metrics(session_id: str, user_id: str = Depends(get_current_user)):
     return get_session_metrics(session_id, user_id)
 
 
+@router.get("/interview/session/submissions")
+def session_submissions(session_id: str, user_id: str = Depends(get_current_user)):
+    return get_session_submissions(session_id, user_id)
+
+
 @router.get("/interview/session/feedback")
 def session_feedback(session_id: str, user_id: str = Depends(get_current_user)):
     return get_session_feedback(session_id, user_id)
@@ -11,6 +11,7 @@ from modules.db import (
     Session_Message,
     Session_Feedback,
     Session_Metrics,
+    Session_Submission,
 )
 from fastapi import APIRouter, Depends, HTTPException, status
 from helpers.get_session_data import parse_session_and_user_ids, get_session_row,get_session_timer
@@ -43,6 +44,25 @@ def _format_message_for_agent(message: str, role: str) -> str:
         return f"[SYSTEM EVENT] {message}"
     return message
 
+def _describe_latest_run(db: Session, session_uuid: uuid.UUID) -> str:
+    submission = db.exec(
+        select(Session_Submission)
+        .where(Session_Submission.session_id == session_uuid)
+        .order_by(Session_Submission.created_at.desc())
+    ).first()
+    if not submission:
+        return "No code runs recorded"
+
+    parts = [f"{submission.kind} ({submission.language}): {submission.verdict}"]
+    if submission.wall_time_ms is not None:
+        parts.append(f"wall {submission.wall_time_ms} ms")
+    if submission.cpu_user_ms is not None:
+        parts.append(f"cpu {submission.cpu_user_ms + (submission.cpu_sys_ms or 0)} ms")
+    if submission.peak_memory_kb is not None:
+        parts.append(f"peak memory {submission.peak_memory_kb} KB")
+    return ", ".join(parts)
+
+
 def _get_session_or_404(db: Session, session_id: str, user_id: str) -> Interview_Session:
     session_uuid, user_uuid = parse_session_and_user_ids(session_id, user_id)
     return get_session_row(db, session_uuid, user_uuid)
@@ -181,6 +201,7 @@ def _run_phase(
                 total_time_spent_sec=metrics.total_time_spent_sec or 0 if metrics else 0,
                 total_submissions=metrics.total_submissions if metrics else 0,
                 hints_used=metrics.hints_used if metrics else 0,
+                latest_run=_describe_latest_run(db, session_row.session_id),
             )
         else:
             agent_context = Context(
@@ -34,6 +34,7 @@ class FeedbackContext(BaseModel):
     total_time_spent_sec: int = Field(description="Actual time the candidate spent in seconds")
     total_submissions: int = Field(description="Number of code submissions the candidate made")
     hints_used: int = Field(description="Number of hints the candidate requested")
+    latest_run: str = Field(default="No code runs recorded", description="Verdict, runtime and peak memory of the candidate's latest code run")
 
 
 # ── Response schemas ────────────────────────────────────────────────────
@@ -155,6 +156,7 @@ def _make_feedback_prompt_middleware(prompt_template: str):
             total_time_spent_sec=ctx.total_time_spent_sec,
             total_submissions=ctx.total_submissions,
             hints_used=ctx.hints_used,
+            latest_run=ctx.latest_run,
         )
     return _prompt
 
@@ -0,0 +1,117 @@
+import os
+import shlex
+import signal
+
+# Memory limit of each sandbox; also the threshold for memory_limit_exceeded verdicts
+RUNNER_MEM_LIMIT_MB = int(os.getenv("RUNNER_MEM_LIMIT_MB", "128"))
+
+# Files the accounting wrapper leaves behind in the sandbox's scratch dir
+RUSAGE_FILE = ".bigo_rusage"
+OOM_FILE = ".bigo_oom_before"
+OOM_MARKER = "@@BIGO_OOM"
+
+# cgroup v2 counter of OOM kills inside the container
+OOM_KILLS = "awk '/^oom_kill /{print $2}' /sys/fs/cgroup/memory.events 2>/dev/null"
+
+
+def accounted(command: str, scratch: str = "/tmp") -> str:
+    """Shell command that runs `command` under `time -v` and snapshots the OOM counter first."""
+    rusage, oom = f"{scratch}/{RUSAGE_FILE}", f"{scratch}/{OOM_FILE}"
+    return f"rm -f {rusage}; {OOM_KILLS} > {oom}; exec time -v -o {rusage} sh -c {shlex.quote(command)}"
+
+
+def usage_report_command(scratch: str = "/tmp") -> list:
+    """Exec command whose output is read back by parse_usage()."""
+    rusage, oom = f"{scratch}/{RUSAGE_FILE}", f"{scratch}/{OOM_FILE}"
+    return ["sh", "-c", f"cat {rusage} 2>/dev/null; echo {OOM_MARKER} $(cat {oom} 2>/dev/null) $({OOM_KILLS})"]
+
+
+def _seconds(value: str) -> float:
+    """Parse `time`'s elapsed format: [h:]m:ss.cc"""
+    total = 0.0
+    for part in value.split(":"):
+        total = total * 60 + float(part)
+    return total
+
+
+def parse_usage(report: str) -> dict:
+    """Parse `time -v` output (GNU and busybox share the labels) plus the OOM marker line."""
+    usage = {
+        "wall_time_ms": None,
+        "cpu_user_ms": None,
+        "cpu_sys_ms": None,
+        "peak_memory_kb": None,
+        "signal": None,
+        "oom_killed": False,
+    }
+
+    for line in report.splitlines():
+        line = line.strip()
+        if line.startswith(OOM_MARKER):
+            counts = line.split()[1:]
+            if len(counts) == 2:
+                usage["oom_killed"] = int(counts[1]) > int(counts[0])
+            continue
+        if line.startswith("Command terminated by signal"):
+            usage["signal"] = int(line.rsplit(" ", 1)[1])
+            continue
+
+        label, _, value = line.rpartition(": ")
+        try:
+            if label == "User time (seconds)":
+                usage["cpu_user_ms"] = round(float(value) * 1000)
+            elif label == "System time (seconds)":
+                usage["cpu_sys_ms"] = round(float(value) * 1000)
+            elif label.startswith("Elapsed (wall clock) time"):
+                usage["wall_time_ms"] = round(_seconds(value) * 1000)
+            elif label == "Maximum resident set size (kbytes)":
+                usage["peak_memory_kb"] = int(value)
+        except ValueError:
+            pass
+
+    return usage
+
+
+def effective_exit_code(exit_code: int | None, usage: dict) -> int | None:
+    # busybox `time` exits with the bare signal number; normalise to the shell's 128 + signal
+    if usage.get("signal"):
+        return 128 + usage["signal"]
+    return exit_code
+
+
+def classify(exit_code: int | None, usage: dict, memory_limit_mb: int = RUNNER_MEM_LIMIT_MB, timed_out: bool = False) -> str:
+    """One of: ok, time_limit_exceeded, memory_limit_exceeded, output_limit_exceeded, runtime_error."""
+    peak = usage.get("peak_memory_kb") or 0
+    # A wrapping shell reports SIGKILL as exit code 137 rather than a signal
+    killed = usage.get("signal") == 9 or exit_code == 137
+    # The OOM killer uses SIGKILL too, so memory is checked before the timeout heuristic
+    if usage.get("oom_killed") or (killed and peak >= memory_limit_mb * 1024 * 0.9):
+        return "memory_limit_exceeded"
+    # Killed for writing past the file size limit (the judge caps each case's output with ulimit -f)
+    if usage.get("signal") == signal.SIGXFSZ or exit_code == 128 + signal.SIGXFSZ:
+        return "output_limit_exceeded"
+    if timed_out:
+        return "time_limit_exceeded"
+    if exit_code:
+        return "runtime_error"
+    return "ok"
+
+
+def worst_usage(usages: list[dict]) -> dict:
+    """Per-field maximum over several runs (e.g. every judged test case)."""
+    worst = public_usage({})
+    for usage in usages:
+        for key, value in public_usage(usage).items():
+            if value is not None and (worst[key] is None or value > worst[key]):
+                worst[key] = value
+    return worst
+
+
+def public_usage(usage: dict) -> dict:
+    """The subset of usage reported to clients and persisted."""
+    return {
+        "wall_time_ms": usage.get("wall_time_ms"),
+        "cpu_user_ms": usage.get("cpu_user_ms"),
+        "cpu_sys_ms": usage.get("cpu_sys_ms"),
+        "peak_memory_kb": usage.get("peak_memory_kb"),
+    }
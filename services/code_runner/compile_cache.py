@@ -0,0 +1,102 @@
+import hashlib
+import io
+import os
+import shutil
+import tarfile
+import uuid
+
+# Where compiled artifacts are stored on the worker
+COMPILE_CACHE_PATH = os.getenv("COMPILE_CACHE_PATH", "/tmp/compile-cache")
+# Named Docker volume backing COMPILE_CACHE_PATH, mounted read-only into runner containers.
+# Falls back to a bind mount of COMPILE_CACHE_PATH when unset (local dev).
+COMPILE_CACHE_VOLUME_NAME = os.getenv("COMPILE_CACHE_VOLUME_NAME", "")
+# Total size the cache may grow to before least-recently-used entries are evicted
+COMPILE_CACHE_MAX_BYTES = int(os.getenv("COMPILE_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# Mount point of the cache inside runner containers
+SANDBOX_CACHE_DIR = "/tmp/compile-cache"
+STAGING_SUFFIX = ".staging-"
+
+
+def cache_key(language: str, compile_template: str, source: str) -> str:
+    digest = hashlib.sha256()
+    for part in (language, compile_template, source):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def volume_config() -> dict:
+    if COMPILE_CACHE_VOLUME_NAME:
+        return {COMPILE_CACHE_VOLUME_NAME: {"bind": SANDBOX_CACHE_DIR, "mode": "ro"}}
+    return {COMPILE_CACHE_PATH: {"bind": SANDBOX_CACHE_DIR, "mode": "ro"}}
+
+
+def lookup(key: str) -> bool:
+    """True if `key` is cached (found under the sandbox's cache dir as `<cache_dir>/<key>`)."""
+    entry = os.path.join(COMPILE_CACHE_PATH, key)
+    if not os.path.isdir(entry):
+        return False
+    try:
+        # mtime doubles as the LRU clock
+        os.utime(entry)
+    except OSError:
+        return False
+    return True
+
+
+def store(key: str, archive: bytes):
+    """Store a build directory exported from a sandbox (tar, as returned by get_archive)."""
+    staging = os.path.join(COMPILE_CACHE_PATH, f"{key}{STAGING_SUFFIX}{uuid.uuid4().hex}")
+    os.makedirs(staging)
+
+    try:
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            members = []
+            for member in tar.getmembers():
+                # Drop the archived directory's own name ("build/main" -> "main")
+                _, _, name = member.name.partition("/")
+                if not name or not (member.isfile() or member.isdir()):
+                    continue
+                member.name = name
+                members.append(member)
+            tar.extractall(staging, members=members, filter="data")
+
+        # Another worker may have stored the same key first; keep theirs
+        os.rename(staging, os.path.join(COMPILE_CACHE_PATH, key))
+    except OSError:
+        shutil.rmtree(staging, ignore_errors=True)
+        return
+
+    evict()
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def evict(max_bytes: int = COMPILE_CACHE_MAX_BYTES):
+    """Remove least-recently-used entries until the cache fits in `max_bytes`."""
+    entries = []
+    with os.scandir(COMPILE_CACHE_PATH) as it:
+        for entry in it:
+            if not entry.is_dir() or STAGING_SUFFIX in entry.name:
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, _dir_size(entry.path), entry.path))
+            except OSError:
+                pass
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
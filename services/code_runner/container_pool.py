@@ -0,0 +1,128 @@
+import os
+import time
+from helpers.redis_client import redis_conn
+
+# Max containers kept per language. 0 disables pooling (every job gets a throwaway container).
+RUNNER_POOL_SIZE = int(os.getenv("RUNNER_POOL_SIZE", "4"))
+# Idle containers to keep pre-started per language.
+RUNNER_POOL_MIN_IDLE = int(os.getenv("RUNNER_POOL_MIN_IDLE", "1"))
+# A container is recycled after this many jobs ...
+RUNNER_POOL_MAX_USES = int(os.getenv("RUNNER_POOL_MAX_USES", "50"))
+# ... or once it is this old, whichever comes first.
+RUNNER_POOL_MAX_AGE_SEC = int(os.getenv("RUNNER_POOL_MAX_AGE_SEC", "600"))
+
+POOL_LABEL = "bigoyu.pool"
+
+
+class ContainerPool:
+    """Per-language pool of pre-started runner containers.
+
+    Pool state lives in Redis so it is shared by every worker process (RQ forks a
+    work-horse per job, so in-process state would be lost after each job).
+    """
+
+    def __init__(self, language: str, client, spawn):
+        self.language = language
+        self._client = client
+        self._spawn = spawn
+        self._idle_key = f"runner_pool:{language}:idle"
+        self._members_key = f"runner_pool:{language}:members"
+        self._uses_key = f"runner_pool:{language}:uses"
+        self._created_key = f"runner_pool:{language}:created"
+
+    def acquire(self):
+        """Lease an idle container, starting a fresh one if none is available."""
+        while True:
+            container_id = redis_conn.lpop(self._idle_key)
+            if container_id is None:
+                break
+            container_id = container_id.decode()
+            container = self._lookup(container_id)
+            if container is not None and not self._expired(container_id):
+                return container
+            self._discard(container_id)
+
+        return self._start(pooled=self._has_capacity())
+
+    def release(self, container, recycle: bool = False):
+        """Return a leased container to the pool, or remove it if it must be recycled."""
+        if not redis_conn.sismember(self._members_key, container.id):
+            self._discard(container.id)
+            return
+
+        uses = redis_conn.hincrby(self._uses_key, container.id, 1)
+        if recycle or uses >= RUNNER_POOL_MAX_USES or self._expired(container.id) or not self._scrub(container):
+            self._discard(container.id)
+        else:
+            redis_conn.rpush(self._idle_key, container.id)
+
+        self.top_up(limit=1)
+
+    def top_up(self, limit: int | None = None):
+        """Start containers until min-idle is satisfied (bounded by pool size)."""
+        started = 0
+        while redis_conn.llen(self._idle_key) < RUNNER_POOL_MIN_IDLE and self._has_capacity():
+            if limit is not None and started >= limit:
+                break
+            container = self._start(pooled=True)
+            redis_conn.rpush(self._idle_key, container.id)
+            started += 1
+
+    def drain(self):
+        """Remove every idle container of this pool."""
+        while True:
+            container_id = redis_conn.lpop(self._idle_key)
+            if container_id is None:
+                break
+            self._discard(container_id.decode())
+
+    def _has_capacity(self) -> bool:
+        return redis_conn.scard(self._members_key) < RUNNER_POOL_SIZE
+
+    def _start(self, pooled: bool):
+        container = self._spawn(labels={POOL_LABEL: self.language} if pooled else {})
+        if pooled:
+            pipe = redis_conn.pipeline()
+            pipe.sadd(self._members_key, container.id)
+            pipe.hset(self._created_key, container.id, int(time.time()))
+            pipe.execute()
+        return container
+
+    def _lookup(self, container_id: str):
+        try:
+            container = self._client.containers.get(container_id)
+        except Exception:
+            return None
+        return container if container.status == "running" else None
+
+    def _expired(self, container_id: str) -> bool:
+        created = redis_conn.hget(self._created_key, container_id)
+        if created is None:
+            return True
+        return time.time() - int(created) >= RUNNER_POOL_MAX_AGE_SEC
+
+    def _scrub(self, container) -> bool:
+        """Kill anything the last job left running and wipe its scratch files."""
+        try:
+            exit_code, _ = container.exec_run(
+                [
+                    "sh", "-c",
+                    "kill -9 -1 2>/dev/null; "
+                    "find /tmp -mindepth 1 -maxdepth 1 ! -name code-execution ! -name compile-cache -exec rm -rf {} +",
+                ],
+                user="runner",
+            )
+        except Exception:
+            return False
+        return exit_code == 0
+
+    def _discard(self, container_id: str):
+        pipe = redis_conn.pipeline()
+        pipe.srem(self._members_key, container_id)
+        pipe.hdel(self._uses_key, container_id)
+        pipe.hdel(self._created_key, container_id)
+        pipe.execute()
+        try:
+            self._client.api.remove_container(container_id, force=True)
+        except Exception:
+            pass
@@ -1,8 +1,23 @@
 import docker
+import io
 import os
+import shutil
+import tarfile
+import threading
+import time
 import uuid
+from contextlib import contextmanager
+from functools import partial
+from services.code_runner import accounting, compile_cache
+from services.code_runner.container_pool import ContainerPool
+from services.code_runner.languages import LANGUAGE_CONFIGS
+from services.code_runner.sandbox import OUTPUT_LIMIT_BYTES, OutputCapture, Sandbox
 
-client = docker.from_env()
+# HTTP connections kept open to the Docker daemon. Every running job streams an exec over its own,
+# so a threaded worker needs a couple per slot.
+DOCKER_MAX_POOL_SIZE = int(os.getenv("DOCKER_MAX_POOL_SIZE", str(max(10, 2 * int(os.getenv("WORKER_SLOTS", "1"))))))
+
+client = docker.from_env(max_pool_size=DOCKER_MAX_POOL_SIZE)
 
 # Path inside this container where code files are written
 CODE_EXECUTION_PATH = os.getenv("CODE_EXECUTION_PATH", "/tmp/code-execution")
@@ -10,100 +25,200 @@ CODE_EXECUTION_PATH = os.getenv("CODE_EXECUTION_PATH", "/tmp/code-execution")
 # When set, the spawned container mounts this volume instead of a host bind mount.
 # Must match the actual Docker volume name (e.g. "bigoyu_code-execution").
 CODE_VOLUME_NAME = os.getenv("CODE_VOLUME_NAME", "")
-
-LANGUAGE_CONFIGS = {
-    "python": {
-        "image": "code-runner-python",
-        "extension": "py",
-        "command": lambda job_id, ext: ["python", f"/tmp/code-execution/{job_id}/main.{ext}"]
-    },
-    "cpp": {
-        "image": "code-runner-cpp",
-        "extension": "cpp",
-        "command": lambda job_id, ext: ["sh", "-c", f"g++ /tmp/code-execution/{job_id}/main.{ext} -o /tmp/main && /tmp/main"]
-    },
-    "java": {
-        "image": "code-runner-java",
-        "extension": "java",
-        "filename": "Solution.java",
-        "command": lambda job_id, ext: ["sh", "-c", f"javac /tmp/code-execution/{job_id}/Solution.{ext} -d /tmp && java -cp /tmp Solution"]
-    }
+# How submissions reach the runner container:
+#   "volume"  - written under CODE_EXECUTION_PATH and read through the shared volume
+#   "archive" - streamed in memory as a tar archive (put_archive); no shared volume needed
+CODE_DELIVERY_MODE = os.getenv("CODE_DELIVERY_MODE", "volume")
+# uid of the "runner" user in the code-runner images; owns archive-delivered files
+RUNNER_UID = int(os.getenv("RUNNER_UID", "1000"))
+
+# Scratch directory for compiler output inside a runner container
+SANDBOX_BUILD_DIR = "/tmp/build"
+# Where archive-delivered jobs land inside a runner container
+SANDBOX_JOBS_DIR = "/tmp/jobs"
+
+
+def _volume_config() -> dict:
+    # Use named volume if available (production), else fall back to bind mount (local dev)
+    if CODE_VOLUME_NAME:
+        return {CODE_VOLUME_NAME: {"bind": "/tmp/code-execution", "mode": "ro"}}
+    return {CODE_EXECUTION_PATH: {"bind": "/tmp/code-execution", "mode": "ro"}}
+
+
+def _start_runner_container(config: dict, labels: dict):
+    """Start an idle, sandboxed runner container that jobs are exec'd into."""
+    volumes = compile_cache.volume_config()
+    # Archive-only deployments don't need the shared code volume at all
+    if CODE_DELIVERY_MODE != "archive":
+        volumes.update(_volume_config())
+
+    return client.containers.run(
+        image=config["image"],
+        command=["tail", "-f", "/dev/null"],
+        volumes=volumes,
+        network_disabled=True,
+        mem_limit=f"{accounting.RUNNER_MEM_LIMIT_MB}m",
+        cpu_quota=50000,
+        pids_limit=64,
+        labels=labels,
+        detach=True,
+    )
+
+
+POOLS = {
+    language: ContainerPool(language, client, partial(_start_runner_container, config))
+    for language, config in LANGUAGE_CONFIGS.items()
 }
 
-def run_code(code: str, language: str, timeout: int = 5) -> dict:
-    if language not in LANGUAGE_CONFIGS:
-        return {"status": "error", "output": f"Unsupported language: {language}"}
-
-    config = LANGUAGE_CONFIGS[language]
-    job_id = str(uuid.uuid4())
-    job_dir = os.path.join(CODE_EXECUTION_PATH, job_id)
-    os.makedirs(job_dir, exist_ok=True)
-
-    filename = config.get("filename", f"main.{config['extension']}")
-    code_path = os.path.join(job_dir, filename)
 
-    try:
-        with open(code_path, "w") as f:
-            f.write(code)
-
-        # Use named volume if available (production), else fall back to bind mount (local dev)
-        if CODE_VOLUME_NAME:
-            volume_config = {
-                CODE_VOLUME_NAME: {"bind": "/tmp/code-execution", "mode": "ro"}
-            }
-        else:
-            volume_config = {
-                CODE_EXECUTION_PATH: {"bind": "/tmp/code-execution", "mode": "ro"}
-            }
-
-        container = client.containers.run(
-            image=config["image"],
-            command=config["command"](job_id, config["extension"]),
-            volumes=volume_config,
-            network_disabled=True,
-            mem_limit="128m",
-            cpu_quota=50000,
-            pids_limit=64,
-            detach=True,
-            stdout=True,
-            stderr=True,
+def _exec_with_timeout(container, command: list, timeout: int, capture: OutputCapture, kill_on_limit: bool = False) -> int | None:
+    """Exec a command in a running container, streaming its output into `capture`.
+
+    Returns the exit code, or None on timeout. With `kill_on_limit`, reading stops (and None is
+    returned) as soon as `capture` overflows; the caller must then retire the container, which
+    kills the process.
+    """
+    exec_id = client.api.exec_create(container.id, command, user="runner")["Id"]
+
+    def _collect():
+        for stdout, stderr in client.api.exec_start(exec_id, stream=True, demux=True):
+            if not capture.feed(stdout, stderr) and kill_on_limit:
+                return
+
+    collector = threading.Thread(target=_collect, daemon=True)
+    collector.start()
+    collector.join(timeout)
+    if collector.is_alive() or (kill_on_limit and capture.truncated):
+        return None
+
+    return client.api.exec_inspect(exec_id)["ExitCode"]
+
+
+def _job_archive(job_id: str, files: dict[str, str]) -> bytes:
+    """In-memory tar of `files` under jobs/<job_id>/, owned by the runner user."""
+    buf = io.BytesIO()
+    now = time.time()
+    with tarfile.open(fileobj=buf, mode="w") as tar:
+        added_dirs = set()
+        for name, content in files.items():
+            path = f"jobs/{job_id}/{name}"
+            parts = path.split("/")
+            for depth in range(1, len(parts)):
+                directory = "/".join(parts[:depth])
+                if directory in added_dirs:
+                    continue
+                info = tarfile.TarInfo(directory)
+                info.type = tarfile.DIRTYPE
+                info.mode = 0o755
+                info.uid = info.gid = RUNNER_UID
+                info.mtime = now
+                tar.addfile(info)
+                added_dirs.add(directory)
+
+            data = content.encode()
+            info = tarfile.TarInfo(path)
+            info.size = len(data)
+            info.mode = 0o644
+            info.uid = info.gid = RUNNER_UID
+            info.mtime = now
+            tar.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+class DockerSandbox(Sandbox):
+    """A leased runner container with the job's files under `job_dir`."""
+
+    build_dir = SANDBOX_BUILD_DIR
+    cache_dir = compile_cache.SANDBOX_CACHE_DIR
+    # /tmp is private to the container and wiped by the pool scrub
+    scratch_dir = "/tmp"
+
+    def __init__(self, container, job_id: str, job_dir: str):
+        super().__init__(job_id, job_dir)
+        self.container = container
+
+    def exec(self, command: list, timeout: int, max_bytes: int = OUTPUT_LIMIT_BYTES) -> tuple[int | None, str]:
+        capture = OutputCapture(max_bytes)
+        exit_code = _exec_with_timeout(self.container, command, timeout, capture)
+        if exit_code is None or exit_code >= 128:
+            self.violation = True
+        return exit_code, capture.output
+
+    def run_accounted(self, command: str, timeout: int) -> tuple[int | None, OutputCapture, dict]:
+        started = time.monotonic()
+        capture = OutputCapture()
+        exit_code = _exec_with_timeout(
+            self.container,
+            ["sh", "-c", accounting.accounted(command, self.scratch_dir)],
+            timeout,
+            capture,
+            kill_on_limit=True,
         )
-
+        if exit_code is None:
+            # Still running (timed out or flooding output): recycling the container kills it
+            self.violation = True
+            usage = accounting.parse_usage("")
+            usage["wall_time_ms"] = round((time.monotonic() - started) * 1000)
+            return None, capture, usage
+        if exit_code >= 128:
+            self.violation = True
+
+        # A separate exec, so the report can't be mixed into the program's output
+        report = OutputCapture()
         try:
-            # Wait for container to finish with specific timeout
-            container.wait(timeout=timeout)
+            _exec_with_timeout(self.container, accounting.usage_report_command(self.scratch_dir), 5, report)
         except Exception:
-            container.kill()
-            return {"status": "error", "output": "Time Limit Exceeded"}
-
-        output = container.logs(stdout=True, stderr=True).decode()
-        container.remove(force=True)
-
-        return {
-            "status": "success",
-            "output": output
-        }
-
-    except Exception as e:
-        return {
-            "status": "error",
-            "output": str(e)
-        }
-    finally:
-        # Cleanup
-        try:
-            if os.path.exists(code_path):
-                os.remove(code_path)
-            if os.path.exists(job_dir):
-                os.rmdir(job_dir)
-        except:
             pass
+        usage = accounting.parse_usage(report.stdout)
+        return accounting.effective_exit_code(exit_code, usage), capture, usage
+
+    def reset(self):
+        # Timed-out or flooding programs keep running after their exec is abandoned.
+        # kill -1 signals every process of the runner user except the caller.
+        _exec_with_timeout(self.container, ["sh", "-c", "kill -9 -1 2>/dev/null; true"], 5, OutputCapture())
+
+    def export(self, path: str) -> bytes:
+        stream, _ = self.container.get_archive(path)
+        return b"".join(stream)
+
 
-def run_python(code: str, timeout: int = 3) -> dict:
-    return run_code(code, "python", timeout)
+@contextmanager
+def sandbox(language: str, files: dict[str, str], delivery: str | None = None):
+    """Lease a pooled container with `files` delivered into a fresh job dir.
 
-def run_cpp(code: str, timeout: int = 3) -> dict:
-    return run_code(code, "cpp", timeout)
+    `delivery` overrides CODE_DELIVERY_MODE for this job. Docker errors propagate to the caller.
+    """
+    delivery = delivery or CODE_DELIVERY_MODE
+    pool = POOLS[language]
+    job_id = str(uuid.uuid4())
+    host_job_dir = os.path.join(CODE_EXECUTION_PATH, job_id)
+    box = None
 
-def run_java(code: str, timeout: int = 3) -> dict:
-    return run_code(code, "java", timeout)
+    try:
+        if delivery == "archive":
+            container = pool.acquire()
+            box = DockerSandbox(container, job_id, f"{SANDBOX_JOBS_DIR}/{job_id}")
+            container.put_archive("/tmp", _job_archive(job_id, files))
+        else:
+            for name, content in files.items():
+                path = os.path.join(host_job_dir, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w") as f:
+                    f.write(content)
+            box = DockerSandbox(pool.acquire(), job_id, f"/tmp/code-execution/{job_id}")
+
+        yield box
+
+    except Exception:
+        if box is not None:
+            box.violation = True
+        raise
+    finally:
+        if box is not None:
+            try:
+                # Recycling force-removes the container, which also kills a timed-out process
+                pool.release(box.container, recycle=box.violation)
+            except Exception:
+                pass
+        # Cleanup (archive-delivered files are wiped by the pool's scrub)
+        shutil.rmtree(host_job_dir, ignore_errors=True)
@@ -0,0 +1,217 @@
+import base64
+import difflib
+import os
+from services.code_runner import accounting
+from services.code_runner.languages import LANGUAGE_CONFIGS, source_filename
+from services.code_runner.runner import sandbox, prepare_build
+from services.code_runner.sandbox import OUTPUT_LIMIT_BYTES
+
+# Per-case wall clock limit inside the harness
+CASE_TIMEOUT_SEC = int(os.getenv("JUDGE_CASE_TIMEOUT_SEC", "2"))
+# Budget for the single compile step of a submission
+COMPILE_TIMEOUT_SEC = int(os.getenv("JUDGE_COMPILE_TIMEOUT_SEC", "10"))
+# Max characters of diff returned per case
+MAX_DIFF_CHARS = 2000
+
+CASE_MARKER = "@@BIGO_CASE"
+STDERR_MARKER = "@@BIGO_STDERR"
+USAGE_MARKER = "@@BIGO_USAGE"
+END_MARKER = "@@BIGO_END"
+
+# Must match _normalize(): strip trailing whitespace per line and trailing blank lines.
+_NORMALIZE_AWK = (
+    "awk '{ sub(/[ \\t\\r]+$/, \"\"); line[NR] = $0 } "
+    "END { n = NR; while (n > 0 && line[n] == \"\") n--; for (i = 1; i <= n; i++) print line[i] }'"
+)
+
+
+def judge_timeout(case_count: int, case_timeout: int = CASE_TIMEOUT_SEC) -> int:
+    """Wall clock budget for judging `case_count` cases (one compile plus every run)."""
+    return COMPILE_TIMEOUT_SEC + case_count * (case_timeout + 1)
+
+
+def _normalize(text: str) -> str:
+    lines = [line.rstrip() for line in text.splitlines()]
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def _build_harness(
+    language: str,
+    job_dir: str,
+    scratch: str,
+    build: str | None,
+    case_count: int,
+    case_timeout: int,
+    stop_on_first_failure: bool,
+) -> str:
+    """Shell harness that runs every case against one (already compiled) build."""
+    run_cmd = LANGUAGE_CONFIGS[language]["run"].format(src=f"{job_dir}/{source_filename(language)}", build=build)
+    lines = [
+        f"JOB_DIR={job_dir}",
+        f"S={scratch}",
+        # Shell diagnostics (e.g. "Killed") would interleave with the encoded case output
+        "exec 2>/dev/null",
+        "i=0",
+        f"while [ $i -lt {case_count} ]; do",
+        f"  oom_before=$({accounting.OOM_KILLS})",
+        "  start=$(date +%s%N)",
+        # ulimit -f (512-byte blocks) kills a case with SIGXFSZ once it writes past the output limit
+        f'  ( ulimit -f {-(-OUTPUT_LIMIT_BYTES // 512)}; time -v -o $S/rusage timeout -s KILL {case_timeout} {run_cmd} < "$JOB_DIR/cases/$i.in" > $S/out 2> $S/err )',
+        "  code=$?",
+        "  end=$(date +%s%N)",
+        f'  echo "{CASE_MARKER} $i $code $(( (end - start) / 1000000 ))"',
+        "  base64 $S/out",
+        f'  echo "{STDERR_MARKER}"',
+        "  base64 $S/err",
+        f'  echo "{USAGE_MARKER}"',
+        "  cat $S/rusage",
+        f'  echo "{accounting.OOM_MARKER} $oom_before $({accounting.OOM_KILLS})"',
+        f'  echo "{END_MARKER}"',
+    ]
+    if stop_on_first_failure:
+        lines += [
+            '  [ $code -eq 0 ] || break',
+            f'  {_NORMALIZE_AWK} $S/out > $S/out.norm',
+            '  cmp -s $S/out.norm "$JOB_DIR/cases/$i.out" || break',
+        ]
+    lines += [
+        "  i=$((i + 1))",
+        "done",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _parse_harness_output(raw: str) -> dict[int, dict]:
+    """Returns {case_index: {exit_code, time_ms, stdout, stderr, usage}}."""
+    cases = {}
+    current = None
+    section = None
+    chunks = {"stdout": [], "stderr": [], "usage": []}
+
+    for line in raw.splitlines():
+        if line.startswith(CASE_MARKER):
+            _, index, exit_code, time_ms = line.split()
+            current = {"exit_code": int(exit_code), "time_ms": int(time_ms)}
+            cases[int(index)] = current
+            section = "stdout"
+            chunks = {"stdout": [], "stderr": [], "usage": []}
+        elif current is None:
+            continue
+        elif line == STDERR_MARKER:
+            section = "stderr"
+        elif line == USAGE_MARKER:
+            section = "usage"
+        elif line == END_MARKER:
+            current["truncated"] = False
+            for key in ("stdout", "stderr"):
+                data = base64.b64decode("".join(chunks[key]))
+                # A file that reached the ulimit -f cap was cut short
+                current["truncated"] |= len(data) >= OUTPUT_LIMIT_BYTES
+                current[key] = data.decode(errors="replace")
+            current["usage"] = accounting.parse_usage("\n".join(chunks["usage"]))
+            current["exit_code"] = accounting.effective_exit_code(current["exit_code"], current["usage"])
+            current = None
+        else:
+            chunks[section].append(line)
+
+    return cases
+
+
+def _case_verdict(case: dict | None, expected: str, case_timeout: int) -> str:
+    if case is None:
+        return "skipped"
+    timed_out = case["exit_code"] == 137 and case["time_ms"] >= case_timeout * 950
+    outcome = accounting.classify(case["exit_code"], case["usage"], timed_out=timed_out)
+    # Python ignores SIGXFSZ and fails with EFBIG instead of being killed
+    if case["truncated"] and outcome in ("ok", "runtime_error"):
+        return "output_limit_exceeded"
+    if outcome != "ok":
+        return outcome
+    if _normalize(case["stdout"]) != _normalize(expected):
+        return "wrong_answer"
+    return "accepted"
+
+
+def _diff(expected: str, actual: str) -> str:
+    diff = "\n".join(difflib.unified_diff(
+        _normalize(expected).splitlines(),
+        _normalize(actual).splitlines(),
+        fromfile="expected",
+        tofile="actual",
+        lineterm="",
+    ))
+    return diff[:MAX_DIFF_CHARS]
+
+
+def judge_submission(
+    code: str,
+    language: str,
+    test_cases: list[dict],
+    stop_on_first_failure: bool = False,
+    case_timeout: int = CASE_TIMEOUT_SEC,
+) -> dict:
+    """Grade `code` against `test_cases` ([{"input", "expected_output"}]) in a single sandbox run."""
+    if language not in LANGUAGE_CONFIGS:
+        return {"status": "error", "output": f"Unsupported language: {language}"}
+
+    files = {source_filename(language): code}
+    for i, case in enumerate(test_cases):
+        files[f"cases/{i}.in"] = case["input"]
+        files[f"cases/{i}.out"] = _normalize(case["expected_output"])
+
+    try:
+        with sandbox(language, files) as box:
+            build, compile_error = prepare_build(box, language, code, COMPILE_TIMEOUT_SEC)
+            if compile_error is not None:
+                return {
+                    "status": "success",
+                    "verdict": "compile_error",
+                    "passed": 0,
+                    "total": len(test_cases),
+                    "compile_output": compile_error,
+                    "usage": accounting.public_usage({}),
+                    "cases": [],
+                }
+
+            harness = _build_harness(language, box.job_dir, box.scratch_dir, build, len(test_cases), case_timeout, stop_on_first_failure)
+            exit_code, output = box.exec(
+                ["sh", "-c", harness],
+                judge_timeout(len(test_cases), case_timeout) - COMPILE_TIMEOUT_SEC,
+                # Every case's stdout and stderr are capped, then base64-encoded (4/3) with markers
+                max_bytes=len(test_cases) * (2 * OUTPUT_LIMIT_BYTES * 4 // 3 + 4096),
+            )
+    except Exception as e:
+        return {"status": "error", "output": str(e)}
+
+    if exit_code is None:
+        return {"status": "error", "output": "Time Limit Exceeded"}
+
+    runs = _parse_harness_output(output)
+
+    results = []
+    for i, case in enumerate(test_cases):
+        run = runs.get(i)
+        verdict = _case_verdict(run, case["expected_output"], case_timeout)
+        results.append({
+            "index": i,
+            "verdict": verdict,
+            "time_ms": run["time_ms"] if run else None,
+            "exit_code": run["exit_code"] if run else None,
+            "usage": accounting.public_usage(run["usage"] if run else {}),
+            "stderr": run["stderr"] if run else "",
+            "diff": _diff(case["expected_output"], run["stdout"]) if verdict == "wrong_answer" else "",
+        })
+
+    failed = next((r["verdict"] for r in results if r["verdict"] not in ("accepted", "skipped")), None)
+    return {
+        "status": "success",
+        "verdict": failed or "accepted",
+        "passed": sum(r["verdict"] == "accepted" for r in results),
+        "total": len(test_cases),
+        "compile_output": "",
+        # Worst case across every judged test
+        "usage": accounting.worst_usage([r["usage"] for r in results]),
+        "cases": results,
+    }
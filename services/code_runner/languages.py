@@ -0,0 +1,29 @@
+# Shell templates per language: {src} is the submitted source file, {build} the directory
+# holding compiled output. Languages without a "compile" step run straight from source.
+# "image" is only used by the Docker backend.
+LANGUAGE_CONFIGS = {
+    "python": {
+        "image": "code-runner-python",
+        "extension": "py",
+        "compile": None,
+        "run": "python {src}",
+    },
+    "cpp": {
+        "image": "code-runner-cpp",
+        "extension": "cpp",
+        "compile": "g++ {src} -o {build}/main",
+        "run": "{build}/main",
+    },
+    "java": {
+        "image": "code-runner-java",
+        "extension": "java",
+        "filename": "Solution.java",
+        "compile": "javac {src} -d {build}",
+        "run": "java -cp {build} Solution",
+    }
+}
+
+
+def source_filename(language: str) -> str:
+    config = LANGUAGE_CONFIGS[language]
+    return config.get("filename", f"main.{config['extension']}")
@@ -0,0 +1,272 @@
+import ctypes
+import errno
+import functools
+import io
+import logging
+import os
+import resource
+import shutil
+import signal
+import socket
+import subprocess
+import tarfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from services.code_runner import accounting, compile_cache
+from services.code_runner.sandbox import OUTPUT_LIMIT_BYTES, OutputCapture, Sandbox
+
+try:
+    import seccomp
+except ImportError:
+    try:
+        import pyseccomp as seccomp
+    except ImportError:
+        seccomp = None
+
+logger = logging.getLogger(__name__)
+
+# Where job directories are created on the worker
+NATIVE_WORK_DIR = os.getenv("NATIVE_WORK_DIR", "/tmp/native-runner")
+# Unprivileged uid/gid jobs run as when the worker runs as root (default: nobody)
+NATIVE_RUNNER_UID = int(os.getenv("NATIVE_RUNNER_UID", "65534"))
+NATIVE_RUNNER_GID = int(os.getenv("NATIVE_RUNNER_GID", "65534"))
+# Address-space cap per process. The JVM reserves far more than it uses, so keep Java on Docker
+# or raise this.
+NATIVE_MEM_LIMIT_MB = int(os.getenv("NATIVE_MEM_LIMIT_MB", str(accounting.RUNNER_MEM_LIMIT_MB)))
+# Address-space cap for compilers (cc1plus alone needs well over 128 MB)
+NATIVE_COMPILE_MEM_LIMIT_MB = int(os.getenv("NATIVE_COMPILE_MEM_LIMIT_MB", "1024"))
+# Processes the runner uid may have at once (shared by every job on this worker)
+NATIVE_PIDS_LIMIT = int(os.getenv("NATIVE_PIDS_LIMIT", "64"))
+# Largest file a job may write
+NATIVE_FILE_LIMIT_MB = int(os.getenv("NATIVE_FILE_LIMIT_MB", "16"))
+# Set to 0 to skip the namespace probe (e.g. the kernel or a seccomp profile forbids user namespaces)
+NATIVE_NAMESPACES = os.getenv("NATIVE_NAMESPACES", "1") == "1"
+
+# Fresh user, PID, mount, network, IPC and UTS namespaces; the whole tree dies with unshare.
+UNSHARE = [
+    "unshare", "--user", "--map-root-user", "--pid", "--fork", "--kill-child",
+    "--mount", "--mount-proc", "--net", "--ipc", "--uts", "--",
+]
+
+# Syscalls a submission never needs. Denied with EPERM rather than killing the process.
+DENIED_SYSCALLS = [
+    "ptrace", "process_vm_readv", "process_vm_writev", "bpf", "perf_event_open",
+    "keyctl", "add_key", "request_key", "userfaultfd", "setns", "io_uring_setup",
+    "init_module", "finit_module", "delete_module", "kexec_load", "kexec_file_load",
+    "reboot", "swapon", "swapoff", "acct", "quotactl", "pivot_root",
+    "settimeofday", "clock_settime", "adjtimex",
+]
+
+PR_SET_NO_NEW_PRIVS = 38
+READ_CHUNK_BYTES = 64 * 1024
+_libc = ctypes.CDLL(None, use_errno=True)
+
+# Only these reach the job; the worker's own environment holds credentials
+_CHILD_PATH = "/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin"
+
+
+def _drops_privileges() -> bool:
+    return os.geteuid() == 0
+
+
+def _confine(cpu_seconds: int, memory_mb: int):
+    """Runs in the child between fork and exec: resource limits, no_new_privs, seccomp."""
+    memory = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (NATIVE_FILE_LIMIT_MB * 1024 * 1024,) * 2)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (64, 64))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    if _drops_privileges():
+        # Per real uid, so it only means something once we're not root
+        resource.setrlimit(resource.RLIMIT_NPROC, (NATIVE_PIDS_LIMIT, NATIVE_PIDS_LIMIT))
+
+    _libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0)
+
+    if seccomp is not None:
+        rules = seccomp.SyscallFilter(defaction=seccomp.ALLOW)
+        for name in DENIED_SYSCALLS:
+            try:
+                rules.add_rule(seccomp.ERRNO(errno.EPERM), name)
+            except Exception:
+                pass  # not present on this architecture
+        # No network, even where a network namespace isn't available
+        rules.add_rule(seccomp.ERRNO(errno.EACCES), "socket", seccomp.Arg(0, seccomp.NE, socket.AF_UNIX))
+        rules.load()
+
+
+def _popen_kwargs(cwd: str, scratch: str, cpu_seconds: int, memory_mb: int = NATIVE_MEM_LIMIT_MB) -> dict:
+    kwargs = {
+        "cwd": cwd,
+        "env": {"PATH": _CHILD_PATH, "HOME": cwd, "TMPDIR": scratch, "LANG": "C.UTF-8"},
+        "stdin": subprocess.DEVNULL,
+        "stdout": subprocess.PIPE,
+        "stderr": subprocess.PIPE,
+        "start_new_session": True,
+        "preexec_fn": functools.partial(_confine, cpu_seconds, memory_mb),
+    }
+    if _drops_privileges():
+        kwargs.update(user=NATIVE_RUNNER_UID, group=NATIVE_RUNNER_GID, extra_groups=[])
+    return kwargs
+
+
+@functools.cache
+def namespaces_available() -> bool:
+    """Whether jobs can be wrapped in UNSHARE here (checked once per process, as the runner uid)."""
+    if not NATIVE_NAMESPACES or shutil.which("unshare") is None:
+        return False
+    try:
+        probe = subprocess.run(UNSHARE + ["true"], timeout=5, **_popen_kwargs("/", "/tmp", 5))
+    except (OSError, subprocess.SubprocessError):
+        probe = None
+    if probe is None or probe.returncode != 0:
+        logger.warning("Namespaces unavailable for native runner; using rlimits and seccomp only")
+        return False
+    return True
+
+
+class NativeSandbox(Sandbox):
+    """A job directory on this host; commands run as confined child processes."""
+
+    cache_dir = compile_cache.COMPILE_CACHE_PATH
+
+    def __init__(self, job_id: str, job_dir: str):
+        super().__init__(job_id, job_dir)
+        self.build_dir = os.path.join(job_dir, ".build")
+        self.scratch_dir = os.path.join(job_dir, ".scratch")
+
+    def _spawn(
+        self,
+        command: list,
+        timeout: int,
+        capture: OutputCapture,
+        kill_on_limit: bool = False,
+        memory_mb: int = NATIVE_MEM_LIMIT_MB,
+    ) -> tuple[int | None, dict]:
+        """Run `command` with its output streamed into `capture`. Returns (exit_code, tree_usage);
+        exit_code is None if it was killed for running too long (or, with `kill_on_limit`, for
+        overflowing `capture`)."""
+        if namespaces_available():
+            command = UNSHARE + command
+        started = time.monotonic()
+        proc = subprocess.Popen(command, **_popen_kwargs(self.job_dir, self.scratch_dir, timeout + 1, memory_mb))
+        killed = threading.Event()
+
+        def _kill():
+            killed.set()
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        def _read(pipe, channel: str):
+            for chunk in iter(lambda: pipe.read1(READ_CHUNK_BYTES), b""):
+                if not capture.feed(**{channel: chunk}) and kill_on_limit:
+                    _kill()
+                    return
+
+        readers = [
+            threading.Thread(target=_read, args=(proc.stdout, "stdout"), daemon=True),
+            threading.Thread(target=_read, args=(proc.stderr, "stderr"), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        timer = threading.Timer(timeout, _kill)
+        timer.start()
+        try:
+            # wait4 gives the rusage of the whole (reaped) process tree
+            _, status, rusage = os.wait4(proc.pid, 0)
+        finally:
+            timer.cancel()
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        # Stray grandchildren may still hold the pipes open
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        for reader in readers:
+            reader.join(1)
+        proc.stdout.close()
+        proc.stderr.close()
+
+        usage = accounting.parse_usage("")
+        usage.update(
+            wall_time_ms=round((time.monotonic() - started) * 1000),
+            cpu_user_ms=round(rusage.ru_utime * 1000),
+            cpu_sys_ms=round(rusage.ru_stime * 1000),
+            peak_memory_kb=rusage.ru_maxrss,
+        )
+        if killed.is_set():
+            self.violation = True
+            return None, usage
+        exit_code = proc.returncode
+        if exit_code < 0:
+            usage["signal"] = -exit_code
+            exit_code = 128 + usage["signal"]
+        return exit_code, usage
+
+    def exec(self, command: list, timeout: int, max_bytes: int = OUTPUT_LIMIT_BYTES) -> tuple[int | None, str]:
+        capture = OutputCapture(max_bytes)
+        exit_code, _ = self._spawn(command, timeout, capture)
+        return exit_code, capture.output
+
+    def compile(self, command: list, timeout: int) -> tuple[int | None, str]:
+        capture = OutputCapture()
+        exit_code, _ = self._spawn(command, timeout, capture, memory_mb=NATIVE_COMPILE_MEM_LIMIT_MB)
+        return exit_code, capture.output
+
+    def run_accounted(self, command: str, timeout: int) -> tuple[int | None, OutputCapture, dict]:
+        capture = OutputCapture()
+        exit_code, tree_usage = self._spawn(
+            ["sh", "-c", accounting.accounted(command, self.scratch_dir)],
+            timeout,
+            capture,
+            kill_on_limit=True,
+        )
+        if exit_code is None:
+            return None, capture, tree_usage
+
+        # wait4's peak RSS includes the forked worker before exec, so prefer `time`'s own report.
+        # The worker's cgroup OOM counter isn't this job's, so it isn't consulted.
+        try:
+            with open(os.path.join(self.scratch_dir, accounting.RUSAGE_FILE)) as f:
+                usage = accounting.parse_usage(f.read())
+        except OSError:
+            usage = tree_usage
+        if usage["peak_memory_kb"] is None:
+            usage = tree_usage
+        return accounting.effective_exit_code(exit_code, usage), capture, usage
+
+    def export(self, path: str) -> bytes:
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w") as tar:
+            tar.add(path, arcname=os.path.basename(path))
+        return buf.getvalue()
+
+
+@contextmanager
+def sandbox(language: str, files: dict[str, str]):
+    """Create a job dir on this host with `files`; removed afterwards."""
+    job_id = str(uuid.uuid4())
+    job_dir = os.path.join(NATIVE_WORK_DIR, job_id)
+
+    try:
+        for name, content in files.items():
+            path = os.path.join(job_dir, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(content)
+        box = NativeSandbox(job_id, job_dir)
+        # The only places the job may write
+        for writable in (box.build_dir, box.scratch_dir):
+            os.makedirs(writable)
+            if _drops_privileges():
+                os.chown(writable, NATIVE_RUNNER_UID, NATIVE_RUNNER_GID)
+        os.chmod(job_dir, 0o755)
+
+        yield box
+    finally:
+        shutil.rmtree(job_dir, ignore_errors=True)
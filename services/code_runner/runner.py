@@ -0,0 +1,246 @@
+import os
+import time
+from typing import Callable
+from services.code_runner import accounting, compile_cache
+from services.code_runner.languages import LANGUAGE_CONFIGS, source_filename
+from services.code_runner.sandbox import Sandbox
+
+# Backend used for every language unless overridden:
+#   "docker" - pooled runner containers (docker_runner)
+#   "native" - confined subprocesses on the worker itself (native_runner); the worker needs
+#              the language's toolchain installed
+#   "stub"   - runs nothing and sleeps for fixed latencies (stub_runner); for benchmarks only
+RUNNER_BACKEND = os.getenv("RUNNER_BACKEND", "docker")
+# Per-language override, e.g. RUNNER_BACKEND_PYTHON=native
+BACKENDS = {
+    language: os.getenv(f"RUNNER_BACKEND_{language.upper()}", RUNNER_BACKEND)
+    for language in LANGUAGE_CONFIGS
+}
+
+
+def backend_for(language: str):
+    # Imported lazily: the Docker client connects to the daemon on import, which native-only
+    # workers may not have
+    if BACKENDS[language] == "native":
+        from services.code_runner import native_runner
+        return native_runner
+    if BACKENDS[language] == "stub":
+        from services.code_runner import stub_runner
+        return stub_runner
+    from services.code_runner import docker_runner
+    return docker_runner
+
+
+def sandbox(language: str, files: dict[str, str]):
+    """Context manager yielding a Sandbox with `files` from the language's configured backend."""
+    return backend_for(language).sandbox(language, files)
+
+
+def prepare_build(
+    box: Sandbox, language: str, code: str, timeout: int, program_dir: str | None = None
+) -> tuple[str | None, str | None]:
+    """Compile `code` inside `box`, or reuse cached artifacts.
+
+    `program_dir` is the job subdirectory holding the source when a box holds several programs
+    (see run_batch); each then builds into its own directory.
+    Returns (build_dir, compile_error); compile_error is None on success.
+    Languages without a compile step get (None, None).
+    """
+    config = LANGUAGE_CONFIGS[language]
+    if not config["compile"]:
+        return None, None
+
+    key = compile_cache.cache_key(language, config["compile"], code)
+    if compile_cache.lookup(key):
+        return f"{box.cache_dir}/{key}", None
+
+    src = f"{_program_path(box.job_dir, program_dir)}/{source_filename(language)}"
+    build_dir = _program_path(box.build_dir, program_dir)
+    compile_cmd = config["compile"].format(src=src, build=build_dir)
+    exit_code, output = box.compile(["sh", "-c", f"mkdir -p {build_dir} && {compile_cmd}"], timeout)
+    if exit_code is None:
+        return None, "Compilation timed out"
+    if exit_code != 0:
+        return None, output
+
+    # Artifacts are exported before any user code runs, so a cached build can't be tampered with
+    try:
+        compile_cache.store(key, box.export(build_dir))
+    except Exception:
+        pass
+    return build_dir, None
+
+
+def _program_path(base: str, program_dir: str | None) -> str:
+    return f"{base}/{program_dir}" if program_dir else base
+
+
+def _elapsed_ms(since: float) -> int:
+    return round((time.monotonic() - since) * 1000)
+
+
+def run_command(
+    box: Sandbox, language: str, build: str | None, stdin_file: str | None = None, program_dir: str | None = None
+) -> str:
+    src = f"{_program_path(box.job_dir, program_dir)}/{source_filename(language)}"
+    command = LANGUAGE_CONFIGS[language]["run"].format(src=src, build=build)
+    if stdin_file:
+        command = f"{command} < {box.job_dir}/{stdin_file}"
+    return command
+
+
+def _compile_error_result(compile_error: str, timings: dict) -> dict:
+    return {
+        "status": "success",
+        "verdict": "compile_error",
+        "output": compile_error,
+        "stdout": "",
+        "stderr": compile_error,
+        "exit_code": None,
+        "usage": accounting.public_usage({}),
+        "timings": timings,
+    }
+
+
+def _run_program(box: Sandbox, command: str, timeout: int, timings: dict) -> dict:
+    """Run one built program in `box` and turn the outcome into a result."""
+    run_started = time.monotonic()
+    exit_code, capture, usage = box.run_accounted(command, timeout)
+    timings["run_ms"] = _elapsed_ms(run_started)
+    if capture.truncated:
+        verdict = "output_limit_exceeded"
+    elif exit_code is None:
+        return {
+            "status": "error",
+            "verdict": "time_limit_exceeded",
+            "output": "Time Limit Exceeded",
+            "stdout": capture.stdout,
+            "stderr": capture.stderr,
+            "exit_code": None,
+            "usage": accounting.public_usage(usage),
+            "timings": timings,
+        }
+    else:
+        verdict = accounting.classify(exit_code, usage)
+
+    return {
+        "status": "success",
+        "verdict": verdict,
+        "output": capture.output,
+        "stdout": capture.stdout,
+        "stderr": capture.stderr,
+        "truncated": capture.truncated,
+        "exit_code": exit_code,
+        "usage": accounting.public_usage(usage),
+        "timings": timings,
+    }
+
+
+def run_code(code: str, language: str, timeout: int = 5, stdin: str = "") -> dict:
+    """Run `code` once and report its output, verdict and resource usage.
+
+    verdict is one of ok, compile_error, runtime_error, time_limit_exceeded, memory_limit_exceeded,
+    output_limit_exceeded. "output" is stdout followed by stderr, each capped at OUTPUT_LIMIT_BYTES.
+    "timings" breaks the worker-side latency down into sandbox_ms (leasing the container and
+    delivering the files), compile_ms and run_ms.
+    """
+    if language not in LANGUAGE_CONFIGS:
+        return {"status": "error", "output": f"Unsupported language: {language}"}
+
+    timings = {"sandbox_ms": None, "compile_ms": None, "run_ms": None}
+    try:
+        requested = time.monotonic()
+        with sandbox(language, {source_filename(language): code, "stdin.txt": stdin}) as box:
+            started = time.monotonic()
+            timings["sandbox_ms"] = _elapsed_ms(requested)
+            build, compile_error = prepare_build(box, language, code, timeout)
+            timings["compile_ms"] = _elapsed_ms(started)
+            if compile_error is not None:
+                return _compile_error_result(compile_error, timings)
+
+            # Compile and run share the time budget
+            remaining = max(1, int(timeout - (time.monotonic() - started)))
+            return _run_program(box, run_command(box, language, build, "stdin.txt"), remaining, timings)
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "output": str(e)
+        }
+
+
+def batch_timeout(program_count: int, item_count: int, timeout: int = 5) -> int:
+    """Wall clock budget for run_batch (every compile plus every run)."""
+    return (program_count + item_count) * timeout
+
+
+def run_batch(
+    language: str,
+    programs: list[str],
+    inputs: list[tuple[int, str]],
+    timeout: int = 5,
+    on_result: Callable[[int, dict], None] | None = None,
+) -> dict:
+    """Run several (program index, stdin) pairs in one sandbox.
+
+    Each distinct program is compiled once, on first use. Every item gets its own `timeout`
+    and a result shaped like run_code()'s; results keep the order of `inputs`, and
+    `on_result(index, result)` is called as each one completes. The batch's verdict is the
+    first item verdict other than ok, and its usage the worst across items.
+    """
+    if language not in LANGUAGE_CONFIGS:
+        return {"status": "error", "output": f"Unsupported language: {language}"}
+
+    files = {f"p{p}/{source_filename(language)}": code for p, code in enumerate(programs)}
+    files.update({f"stdin{i}.txt": stdin for i, (_, stdin) in enumerate(inputs)})
+    results = []
+    try:
+        requested = time.monotonic()
+        with sandbox(language, files) as box:
+            sandbox_ms = _elapsed_ms(requested)
+            builds = {}
+            for i, (p, _) in enumerate(inputs):
+                # The sandbox is paid for once; later items report 0
+                timings = {"sandbox_ms": sandbox_ms if i == 0 else 0, "compile_ms": 0, "run_ms": None}
+                if p not in builds:
+                    started = time.monotonic()
+                    builds[p] = prepare_build(box, language, programs[p], timeout, program_dir=f"p{p}")
+                    timings["compile_ms"] = _elapsed_ms(started)
+
+                build, compile_error = builds[p]
+                if compile_error is not None:
+                    result = _compile_error_result(compile_error, timings)
+                else:
+                    if box.violation:
+                        # A killed run may have left processes behind
+                        box.reset()
+                    command = run_command(box, language, build, f"stdin{i}.txt", program_dir=f"p{p}")
+                    result = _run_program(box, command, timeout, timings)
+
+                results.append(result)
+                if on_result is not None:
+                    on_result(i, result)
+
+    except Exception as e:
+        return {
+            "status": "error",
+            "output": str(e),
+            "results": results,
+        }
+
+    return {
+        "status": "success",
+        "verdict": next((r["verdict"] for r in results if r["verdict"] != "ok"), "ok"),
+        "results": results,
+        "usage": accounting.worst_usage([r["usage"] for r in results]),
+    }
+
+
+def run_python(code: str, timeout: int = 3) -> dict:
+    return run_code(code, "python", timeout)
+
+def run_cpp(code: str, timeout: int = 3) -> dict:
+    return run_code(code, "cpp", timeout)
+
+def run_java(code: str, timeout: int = 3) -> dict:
+    return run_code(code, "java", timeout)
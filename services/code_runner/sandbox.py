@@ -0,0 +1,112 @@
+import os
+
+# Bytes of stdout (and, separately, of stderr) kept per run. A program that writes more is
+# killed and its output truncated.
+OUTPUT_LIMIT_BYTES = int(os.getenv("RUNNER_OUTPUT_LIMIT_KB", "64")) * 1024
+
+TRUNCATION_MARKER = "\n[output truncated: limit of {limit} bytes reached]\n"
+STDERR_TRUNCATION_MARKER = "[earlier stderr truncated: only the last {limit} bytes are kept]\n"
+
+
+class OutputCapture:
+    """Bounded stdout/stderr buffers for one exec.
+
+    stdout keeps its first `limit` bytes; stderr keeps its last `limit` bytes, where
+    tracebacks and compiler errors end up. Memory stays flat however much is written.
+    """
+
+    def __init__(self, limit: int = OUTPUT_LIMIT_BYTES):
+        self.limit = limit
+        self._stdout = bytearray()
+        self._stderr = bytearray()
+        self.stdout_truncated = False
+        self.stderr_truncated = False
+
+    @property
+    def truncated(self) -> bool:
+        return self.stdout_truncated or self.stderr_truncated
+
+    def feed(self, stdout: bytes | None = None, stderr: bytes | None = None) -> bool:
+        """Add a chunk. Returns False once either channel went over the limit."""
+        if stdout:
+            room = self.limit - len(self._stdout)
+            if len(stdout) > room:
+                self.stdout_truncated = True
+            self._stdout += stdout[:max(room, 0)]
+        if stderr:
+            self._stderr += stderr
+            if len(self._stderr) > self.limit:
+                self.stderr_truncated = True
+                del self._stderr[:len(self._stderr) - self.limit]
+        return not self.truncated
+
+    @property
+    def stdout(self) -> str:
+        text = self._stdout.decode(errors="replace")
+        if self.stdout_truncated:
+            text += TRUNCATION_MARKER.format(limit=self.limit)
+        return text
+
+    @property
+    def stderr(self) -> str:
+        text = self._stderr.decode(errors="replace")
+        if self.stderr_truncated:
+            text = STDERR_TRUNCATION_MARKER.format(limit=self.limit) + text
+        return text
+
+    @property
+    def output(self) -> str:
+        """stdout followed by stderr."""
+        return self.stdout + self.stderr
+
+
+class Sandbox:
+    """An isolated place to compile and run one job, with the job's files under `job_dir`.
+
+    Backends (docker_runner, native_runner) subclass this and provide a `sandbox()`
+    context manager that delivers the files, yields the box and cleans up afterwards.
+    """
+
+    # Directory compilers write artifacts to
+    build_dir: str
+    # Where compile-cache entries are visible from inside the sandbox
+    cache_dir: str
+    # Writable per-job scratch space (e.g. the judge harness' output files)
+    scratch_dir: str
+
+    def __init__(self, job_id: str, job_dir: str):
+        self.job_id = job_id
+        self.job_dir = job_dir
+        # Any sandbox violation (timeout, signal kill, backend error) means the box must not be reused.
+        self.violation = False
+
+    def exec(self, command: list, timeout: int, max_bytes: int = OUTPUT_LIMIT_BYTES) -> tuple[int | None, str]:
+        """Returns (exit_code, output); exit_code is None when the timeout was hit.
+
+        For commands whose output is bounded by construction (compilers, the judge harness):
+        output past `max_bytes` is drained and dropped, and the command runs to completion.
+        """
+        raise NotImplementedError
+
+    def compile(self, command: list, timeout: int) -> tuple[int | None, str]:
+        """Like exec(), for trusted toolchain steps that may need more headroom than user code."""
+        return self.exec(command, timeout)
+
+    def run_accounted(self, command: str, timeout: int) -> tuple[int | None, OutputCapture, dict]:
+        """Run a user program (shell command) and measure it.
+
+        Returns (exit_code, capture, usage) where usage has the keys of accounting.parse_usage().
+        The program is killed as soon as its output exceeds OUTPUT_LIMIT_BYTES; then
+        capture.truncated is set and exit_code is None, as it is on timeout.
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        """Kill whatever an earlier command left running (e.g. after a timeout) before the next one.
+
+        A no-op for backends whose commands cannot outlive their exec.
+        """
+
+    def export(self, path: str) -> bytes:
+        """Tar archive of `path` (top-level entry named after its basename), as get_archive returns it."""
+        raise NotImplementedError
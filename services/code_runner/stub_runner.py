@@ -0,0 +1,54 @@
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from services.code_runner import accounting
+from services.code_runner.sandbox import OUTPUT_LIMIT_BYTES, OutputCapture, Sandbox
+
+# Simulated latencies of the stub backend, which runs nothing. Meant for benchmarking the queue,
+# worker and API around the runners on machines without Docker.
+STUB_START_MS = int(os.getenv("STUB_START_MS", "20"))
+STUB_COMPILE_MS = int(os.getenv("STUB_COMPILE_MS", "300"))
+STUB_RUN_MS = int(os.getenv("STUB_RUN_MS", "50"))
+STUB_OUTPUT = "stub\n"
+
+
+class StubSandbox(Sandbox):
+    """Sleeps instead of executing; every program "prints" STUB_OUTPUT and exits 0."""
+
+    build_dir = "/stub/build"
+    cache_dir = "/stub/compile-cache"
+    scratch_dir = "/stub/tmp"
+
+    def exec(self, command: list, timeout: int, max_bytes: int = OUTPUT_LIMIT_BYTES) -> tuple[int | None, str]:
+        return 0, ""
+
+    def compile(self, command: list, timeout: int) -> tuple[int | None, str]:
+        if STUB_COMPILE_MS >= timeout * 1000:
+            time.sleep(timeout)
+            return None, ""
+        time.sleep(STUB_COMPILE_MS / 1000)
+        return 0, ""
+
+    def run_accounted(self, command: str, timeout: int) -> tuple[int | None, OutputCapture, dict]:
+        capture = OutputCapture()
+        usage = accounting.parse_usage("")
+        if STUB_RUN_MS >= timeout * 1000:
+            time.sleep(timeout)
+            usage["wall_time_ms"] = timeout * 1000
+            return None, capture, usage
+        time.sleep(STUB_RUN_MS / 1000)
+        capture.feed(stdout=STUB_OUTPUT.encode())
+        usage.update(wall_time_ms=STUB_RUN_MS, cpu_user_ms=STUB_RUN_MS, cpu_sys_ms=0, peak_memory_kb=1024)
+        return 0, capture, usage
+
+    def export(self, path: str) -> bytes:
+        # Nothing was built, so nothing may enter the compile cache
+        raise NotImplementedError("stub sandboxes produce no artifacts")
+
+
+@contextmanager
+def sandbox(language: str, files: dict[str, str]):
+    job_id = str(uuid.uuid4())
+    time.sleep(STUB_START_MS / 1000)
+    yield StubSandbox(job_id, f"/stub/jobs/{job_id}")
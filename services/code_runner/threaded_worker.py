@@ -0,0 +1,167 @@
+"""RQ worker that runs several code jobs at once in one process.
+
+    python -m services.code_runner.threaded_worker code_queue_high code_queue --slots 8
+
+A code job spends nearly all its time waiting on the Docker daemon, so instead of one forked
+work-horse per job this runs WORKER_SLOTS jobs side by side on threads sharing one Docker client.
+Each slot is an RQ worker of its own (named <hostname>.<pid>.slot-<n>): it shows up in
+Worker.count(), which admission control sizes the backlog by, and keeps its own heartbeat,
+state and job counters in Redis.
+
+SIGTERM/SIGINT stops taking jobs and waits for running ones to finish; a second signal exits
+immediately and leaves the interrupted jobs to RQ's abandoned-job cleanup.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from rq import SimpleWorker
+from rq.exceptions import StopRequested
+from rq.timeouts import TimerDeathPenalty
+from rq.utils import now
+from rq.worker import WorkerStatus
+from helpers.redis_client import redis_conn
+from helpers.scheduler import QUEUES
+
+# Jobs run concurrently by one worker process
+WORKER_SLOTS = int(os.getenv("WORKER_SLOTS", "4"))
+# How often the supervisor checks (and logs) slot health
+SLOT_HEALTH_INTERVAL_SEC = int(os.getenv("SLOT_HEALTH_INTERVAL_SEC", "60"))
+# How long an idle slot blocks on the queues before re-checking for shutdown
+SLOT_POLL_SEC = 5
+# Supervisor tick; bounds how quickly a crashed slot is replaced
+SUPERVISE_TICK_SEC = 1
+
+logger = logging.getLogger(__name__)
+
+
+class SlotWorker(SimpleWorker):
+    """A SimpleWorker that runs on a non-main thread.
+
+    Signals can only be handled on the main thread, so the supervisor owns them, and job
+    timeouts use a timer thread instead of SIGALRM.
+    """
+
+    death_penalty_class = TimerDeathPenalty
+
+    def _install_signal_handlers(self):
+        pass
+
+    def dequeue_job_and_maintain_ttl(self, timeout, max_idle_time=None):
+        # Wake up every SLOT_POLL_SEC so an idle slot notices a stop request
+        while not self._stop_requested:
+            result = super().dequeue_job_and_maintain_ttl(SLOT_POLL_SEC, max_idle_time=SLOT_POLL_SEC)
+            if result is not None:
+                return result
+        raise StopRequested()
+
+    def stop_after_current_job(self):
+        self._stop_requested = True
+        self._shutdown_requested_date = now()
+        self.set_shutdown_requested_date()
+
+
+class ThreadedWorker:
+    """Runs `slots` SlotWorkers on threads and replaces any that crash."""
+
+    def __init__(self, queues: list[str], slots: int = WORKER_SLOTS):
+        self.queues = queues
+        self.slots: list[tuple[SlotWorker, threading.Thread] | None] = [None] * slots
+        self.name = f"{socket.gethostname()}.{os.getpid()}"
+        self.restarts = 0
+        self._stopping = False
+        self._last_report = time.monotonic()
+
+    def _start_slot(self, index: int):
+        worker = SlotWorker(
+            self.queues,
+            # A slot's worker registers its death on exit, so a replacement may reuse the name
+            name=f"{self.name}.slot-{index}",
+            connection=redis_conn,
+        )
+        thread = threading.Thread(target=worker.work, name=f"slot-{index}", daemon=True)
+        thread.start()
+        self.slots[index] = (worker, thread)
+
+    def _request_stop(self, signum, frame):
+        if self._stopping:
+            logger.warning("Second %s: exiting without waiting for running jobs", signal.Signals(signum).name)
+            raise SystemExit(1)
+        logger.info("Stopping: no new jobs; waiting for running ones (signal again to exit now)")
+        self._stopping = True
+        for worker, _ in self.slots:
+            worker.stop_after_current_job()
+
+    def health(self) -> list[dict]:
+        """State of every slot: whether its thread is alive, plus what it last wrote to Redis."""
+        report = []
+        for index, (worker, thread) in enumerate(self.slots):
+            state, job_id, successful, failed, heartbeat = (
+                value.decode() if value is not None else None
+                for value in redis_conn.hmget(
+                    worker.key, "state", "current_job", "successful_job_count", "failed_job_count", "last_heartbeat"
+                )
+            )
+            report.append({
+                "slot": index,
+                "name": worker.name,
+                "alive": thread.is_alive(),
+                "state": state,
+                "job_id": job_id,
+                "successful": int(successful or 0),
+                "failed": int(failed or 0),
+                "last_heartbeat": heartbeat,
+            })
+        return report
+
+    def _supervise(self):
+        for index, (worker, thread) in enumerate(self.slots):
+            if thread.is_alive() or self._stopping:
+                continue
+            # SimpleWorker.work() returns on unhandled errors (e.g. Redis went away); keep capacity up
+            logger.error("Slot %d (%s) stopped unexpectedly; restarting it", index, worker.name)
+            self.restarts += 1
+            self._start_slot(index)
+
+        if time.monotonic() - self._last_report >= SLOT_HEALTH_INTERVAL_SEC:
+            self._last_report = time.monotonic()
+            slots = self.health()
+            busy = sum(s["state"] == WorkerStatus.BUSY.value for s in slots)
+            logger.info(
+                "Slots: %d busy, %d idle, %d dead; %d restarted so far",
+                busy,
+                sum(s["alive"] for s in slots) - busy,
+                sum(not s["alive"] for s in slots),
+                self.restarts,
+            )
+
+    def work(self):
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        for index in range(len(self.slots)):
+            self._start_slot(index)
+        logger.info("Worker %s running %d slots on %s", self.name, len(self.slots), ", ".join(self.queues))
+
+        while any(thread.is_alive() for _, thread in self.slots) or not self._stopping:
+            self._supervise()
+            time.sleep(SUPERVISE_TICK_SEC)
+        logger.info("Worker %s stopped", self.name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("queues", nargs="*", default=[q.name for q in QUEUES], help="in priority order")
+    parser.add_argument("--slots", type=int, default=WORKER_SLOTS)
+    args = parser.parse_args()
+
+    # Sizes the shared Docker client's connection pool (read when docker_runner is first imported)
+    os.environ["WORKER_SLOTS"] = str(args.slots)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    ThreadedWorker(args.queues, args.slots).work()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,89 @@
-from services.code_runner.docker_runner import run_code as execute_in_docker
+import json
+import logging
+from rq import get_current_job
+from services.code_runner.runner import run_code as execute_in_sandbox, run_batch as execute_batch_in_sandbox
+from services.code_runner.judge import judge_submission
+from helpers.redis_client import job_channel
+from helpers.execution_cache import store_result, release_inflight
+from helpers.populate_sesson_metrics import record_submission
+from helpers.scheduler import release_slot, record_timings
 
+logger = logging.getLogger(__name__)
 
-def run_code(code:str,language:str):
-    return execute_in_docker(code, language)
\ No newline at end of file
+
+def run_code(code:str,language:str,stdin:str=""):
+    result = execute_in_sandbox(code, language, stdin=stdin)
+    job = get_current_job()
+    if "timings" in result and job is not None and job.enqueued_at and job.started_at:
+        result["timings"]["queue_wait_ms"] = round((job.started_at - job.enqueued_at).total_seconds() * 1000)
+    return result
+
+
+def run_batch(programs:list[str],language:str,inputs:list[tuple[int,str]]):
+    job = get_current_job()
+
+    def _publish_item(index: int, result: dict):
+        # Streamed to /execute/{job_id}/stream listeners as each item completes
+        if job is not None:
+            job.connection.publish(
+                job_channel(job.id),
+                json.dumps({"job_id": job.id, "status": "item", "index": index, "result": result}),
+            )
+
+    return execute_batch_in_sandbox(language, programs, inputs, on_result=_publish_item)
+
+
+def judge_code(code:str,language:str,test_cases:list[dict],stop_on_first_failure:bool=False):
+    return judge_submission(code, language, test_cases, stop_on_first_failure)
+
+
+# ── RQ callbacks: push the outcome to API listeners via Redis pub/sub ──
+
+def _finish(job):
+    """Scheduler bookkeeping shared by both callbacks."""
+    record_timings(job)
+    if job.meta.get("holds_slot"):
+        release_slot(job.meta["user_id"])
+
+
+def publish_result(job, connection, result, *args, **kwargs):
+    _finish(job)
+    cache_key = job.meta.get("cache_key")
+    if cache_key:
+        # Infra errors are not cached; only completed runs are reusable
+        if isinstance(result, dict) and result.get("status") == "success":
+            store_result(cache_key, json.dumps(result))
+        release_inflight(cache_key, job.id)
+
+    # Results carrying a verdict (including time/memory limit hits) are kept per submission
+    session_id = job.meta.get("session_id")
+    if session_id and isinstance(result, dict) and result.get("verdict"):
+        try:
+            record_submission(
+                session_id,
+                job.meta["user_id"],
+                job.meta.get("language"),
+                job.meta.get("kind", "run"),
+                result,
+                job_id=job.id,
+            )
+        except Exception:
+            # Losing the accounting row must not hide the result from the user
+            logger.exception("Failed to record submission for job %s", job.id)
+
+    connection.publish(
+        job_channel(job.id),
+        json.dumps({"job_id": job.id, "status": "finished", "result": result}),
+    )
+
+
+def publish_failure(job, connection, type, value, traceback):
+    _finish(job)
+    cache_key = job.meta.get("cache_key")
+    if cache_key:
+        release_inflight(cache_key, job.id)
+
+    connection.publish(
+        job_channel(job.id),
+        json.dumps({"job_id": job.id, "status": "failed", "error": "Job failed"}),
+    )